@@ -0,0 +1,132 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+
+QUESTION_POOL_TIMEOUT = 60 * 60 * 24
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+# Answer keys kept in process memory, least recently used evicted first
+LOCAL_ANSWER_KEYS_SIZE = 256
+
+# (test_assessment_id, difficulty) -> (version, ids); saves a cache round trip and
+# an unpickle per pool on every session start
+_local_pools = {}
+
+# (content_type_id, object_id) -> (version, answer keys)
+_local_answer_keys = OrderedDict()
+_local_answer_keys_lock = threading.Lock()
+
+
+def _question_pool_version_key(test_assessment_id):
+    return f"question_pool_version_{test_assessment_id}"
+
+
+def _question_pool_key(test_assessment_id, difficulty, version):
+    return f"question_pool_{test_assessment_id}_{difficulty}_{version}"
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_question_pool_version(test_assessment_id):
+    return _get_version(_question_pool_version_key(test_assessment_id))
+
+
+def bump_question_pool_version(test_assessment_id):
+    cache.set(_question_pool_version_key(test_assessment_id), time.time_ns(), None)
+
+
+def schedule_question_pool_bump(test_assessment_id):
+    # Bump after commit so readers can't re-cache pre-commit rows under the new version
+    transaction.on_commit(lambda: bump_question_pool_version(test_assessment_id))
+
+
+def _build_question_pool(test_assessment_id, difficulty):
+    from .models import Question, TestAssessment
+
+    ids = Question.objects.filter(
+        content_type=ContentType.objects.get_for_model(TestAssessment),
+        object_id=test_assessment_id,
+        difficulty=difficulty,
+    ).values_list("id", flat=True)
+    return array("q", ids)
+
+
+def get_question_pool(test_assessment_id, difficulty):
+    """
+    Ids of a test assessment's questions of one difficulty, for sampling in Python
+    instead of sorting the question bank by random().
+    """
+    version = get_question_pool_version(test_assessment_id)
+    local_key = (test_assessment_id, difficulty)
+    local = _local_pools.get(local_key)
+    if local is not None and local[0] == version:
+        return local[1]
+
+    key = _question_pool_key(test_assessment_id, difficulty, version)
+    pool = cache.get(key)
+    if pool is None:
+        pool = _build_question_pool(test_assessment_id, difficulty)
+        cache.set(key, pool, QUESTION_POOL_TIMEOUT)
+    _local_pools[local_key] = (version, pool)
+    return pool
+
+
+def _answer_key_version_key(content_type_id, object_id):
+    return f"answer_key_version_{content_type_id}_{object_id}"
+
+
+def _answer_key_key(content_type_id, object_id, version):
+    return f"answer_key_{content_type_id}_{object_id}_{version}"
+
+
+def bump_answer_key_version(content_type_id, object_id):
+    cache.set(_answer_key_version_key(content_type_id, object_id), time.time_ns(), None)
+
+
+def schedule_answer_key_bump(content_type_id, object_id):
+    transaction.on_commit(lambda: bump_answer_key_version(content_type_id, object_id))
+
+
+def get_answer_key(content_type_id, object_id):
+    """
+    Compiled answer keys (see assessments.grading) of every question of an
+    assessment, by question id. Held in process memory and in the cache, both
+    keyed by a version that question and option changes bump.
+    """
+    from .grading import compile_answer_keys
+    from .models import Question
+
+    version = _get_version(_answer_key_version_key(content_type_id, object_id))
+    local_key = (content_type_id, object_id)
+    with _local_answer_keys_lock:
+        local = _local_answer_keys.get(local_key)
+        if local is not None and local[0] == version:
+            _local_answer_keys.move_to_end(local_key)
+            return local[1]
+
+    key = _answer_key_key(content_type_id, object_id, version)
+    answer_keys = cache.get(key)
+    if answer_keys is None:
+        answer_keys = compile_answer_keys(
+            Question.objects.filter(
+                content_type_id=content_type_id, object_id=object_id
+            )
+        )
+        cache.set(key, answer_keys, ANSWER_KEY_TIMEOUT)
+
+    with _local_answer_keys_lock:
+        _local_answer_keys[local_key] = (version, answer_keys)
+        _local_answer_keys.move_to_end(local_key)
+        if len(_local_answer_keys) > LOCAL_ANSWER_KEYS_SIZE:
+            _local_answer_keys.popitem(last=False)
+    return answer_keys
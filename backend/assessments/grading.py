@@ -0,0 +1,82 @@
+"""
+Answer marking. An answer key holds everything grading needs to know about a
+question, compiled for a whole set of questions in one query, so a session's
+answers are graded in memory instead of a lookup per answer.
+"""
+
+import logging
+from typing import NamedTuple
+
+from django.db.models import OuterRef, Subquery
+
+from .exceptions import NoCorrectOptionError
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerKey(NamedTuple):
+    type: str
+    correct_option_id: int | None
+    # Normalized with `normalize_answer`
+    correct_answer: str | None
+    is_true: bool | None
+    # The correct answer as shown with results
+    display: str | None
+
+
+def normalize_answer(value):
+    # TODO: Mutate model to allow FIB questions to have multiple allowed answers (besides case-sensitivity)
+    return value.strip().lower()
+
+
+def compile_answer_keys(questions):
+    """Answer keys of a Question queryset, by question id."""
+    from .models import Option
+
+    correct_option = Option.objects.filter(question=OuterRef("pk"), is_correct=True)
+    rows = questions.annotate(
+        correct_option_id=Subquery(correct_option.values("id")[:1]),
+        correct_option_text=Subquery(correct_option.values("text")[:1]),
+    ).values_list(
+        "id",
+        "type",
+        "correct_option_id",
+        "correct_option_text",
+        "correct_answer",
+        "is_true",
+    )
+    return {question_id: _compile_answer_key(*row) for question_id, *row in rows}
+
+
+def _compile_answer_key(
+    type, correct_option_id, correct_option_text, correct_answer, is_true
+):
+    if type == "MCQ":
+        display = correct_option_text
+    elif type == "TF":
+        display = "true" if is_true else "false"
+    else:
+        display = correct_answer
+    return AnswerKey(
+        type,
+        correct_option_id,
+        normalize_answer(correct_answer) if correct_answer is not None else None,
+        is_true,
+        display,
+    )
+
+
+def is_correct(key, input, option_id):
+    if key.type == "MCQ":
+        if key.correct_option_id is None:
+            raise NoCorrectOptionError()
+        return option_id is not None and int(option_id) == key.correct_option_id
+
+    elif key.type == "FIB":
+        return bool(input) and normalize_answer(input) == key.correct_answer
+
+    elif key.type == "TF":
+        return input == str(key.is_true).lower()
+
+    logger.error("Invalid question type found: %s" % key.type)
+    return False
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from assessments.models import (TestSession, TestSessionAnswer,
+                                TestSessionQuestion)
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert test sessions stored as TestSessionQuestion/TestSessionAnswer rows "
+        "to packed storage, deleting the rows they replace"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of sessions converted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        converted = 0
+
+        while True:
+            with transaction.atomic():
+                sessions = list(
+                    TestSession.objects.filter(storage=TestSession.Storage.ROWS)
+                    .select_for_update(skip_locked=True)
+                    .order_by("id")
+                    .prefetch_related(
+                        Prefetch(
+                            "questions",
+                            queryset=TestSessionQuestion.objects.select_related(
+                                "answer"
+                            ).order_by("order"),
+                        )
+                    )[:batch_size]
+                )
+                if not sessions:
+                    break
+
+                for test_session in sessions:
+                    _pack(test_session)
+                TestSession.objects.bulk_update(
+                    sessions, ["storage", "packed_questions", "packed_answers"]
+                )
+                # Answers go with their questions through the cascade
+                TestSessionQuestion.objects.filter(test_session__in=sessions).delete()
+
+            converted += len(sessions)
+            self.stdout.write(f"Packed {converted} test sessions...")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Packed {converted} test sessions in total")
+        )
+
+
+def _pack(test_session):
+    test_session.storage = TestSession.Storage.PACKED
+    test_session.packed_questions = []
+    test_session.packed_answers = {}
+    for session_question in test_session.questions.all():
+        test_session.packed_questions.append(
+            {
+                "id": session_question.question_id,
+                "type": session_question.snapshot_type,
+                "text": session_question.snapshot_text,
+                "options": session_question.snapshot_options,
+            }
+        )
+        try:
+            answer = session_question.answer
+        except TestSessionAnswer.DoesNotExist:
+            continue
+        test_session.packed_answers[str(session_question.question_id)] = {
+            "input": answer.input,
+            "option_id": answer.option_id,
+            "is_correct": answer.is_correct,
+        }
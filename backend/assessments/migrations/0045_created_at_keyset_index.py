@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assessments", "0044_alter_courseassessment_course"),
+        ("categories", "0002_alter_category_options"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="question",
+            index=models.Index(
+                fields=["created_at", "id"], name="assessments_created_6c2a1b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="testsession",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="assessments_user_id_0fa55c_idx",
+            ),
+        ),
+    ]
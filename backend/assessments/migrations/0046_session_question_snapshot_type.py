@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:29
+
+from django.db import migrations, models
+from django.db.models import Prefetch
+
+
+def snapshot_existing_questions(apps, schema_editor):
+    Option = apps.get_model("assessments", "Option")
+    TestSessionQuestion = apps.get_model("assessments", "TestSessionQuestion")
+
+    # Sessions are rendered from the snapshot alone, so fill it in for older rows
+    session_questions = TestSessionQuestion.objects.filter(
+        snapshot_type=""
+    ).prefetch_related(
+        Prefetch("question__options", queryset=Option.objects.order_by("id"))
+    )
+    batch = []
+    for session_question in session_questions.iterator(chunk_size=1000):
+        question = session_question.question
+        session_question.snapshot_type = question.type
+        if question.type == "MCQ":
+            session_question.snapshot_options = [
+                {"id": option.id, "text": option.text}
+                for option in question.options.all()
+            ]
+        batch.append(session_question)
+        if len(batch) == 1000:
+            TestSessionQuestion.objects.bulk_update(
+                batch, ["snapshot_type", "snapshot_options"]
+            )
+            batch = []
+    TestSessionQuestion.objects.bulk_update(
+        batch, ["snapshot_type", "snapshot_options"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assessments", "0045_created_at_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsessionquestion",
+            name="snapshot_type",
+            field=models.CharField(blank=True, max_length=4),
+        ),
+        migrations.RunPython(snapshot_existing_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assessments", "0046_session_question_snapshot_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsession",
+            name="packed_answers",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="testsession",
+            name="packed_questions",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="testsession",
+            name="storage",
+            field=models.CharField(
+                choices=[("ROWS", "Rows"), ("PACKED", "Packed")],
+                default="ROWS",
+                max_length=6,
+            ),
+        ),
+    ]
@@ -7,7 +7,7 @@ class LessonAssessment(TimeStampedModel):
     lesson = models.OneToOneField("courses.Lesson", on_delete=models.CASCADE)
 
     def __str__(self):
-        return f"Lesson Assessment: {self.lesson.module.course.title} - {self.lesson.order}"
+        return f"Lesson Assessment: {self.lesson.course.title} - {self.lesson.order}"
 
 
 # NOTE: Module assessments work, but they are not currently used in the system (yet)
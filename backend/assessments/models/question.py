@@ -35,6 +35,9 @@ class Question(TimeStampedModel):
     is_active = models.BooleanField(default=True)
     type = models.CharField(max_length=4, choices=QuestionTypes.choices)
 
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"])]
+
     def clean(self) -> None:
         if not self.pk:
             return
@@ -38,6 +38,12 @@ class TestSession(TimeStampedModel):
         SUBMITTED = "S", "Submitted"
         ERROR = "ERR", "Error"
 
+    class Storage(models.TextChoices):
+        # A TestSessionQuestion row per question, and a TestSessionAnswer per answer
+        ROWS = "ROWS", "Rows"
+        # Questions and answers packed into the session row itself
+        PACKED = "PACKED", "Packed"
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     test_assessment = models.ForeignKey(
         "assessments.TestAssessment", on_delete=models.CASCADE
@@ -61,10 +67,24 @@ class TestSession(TimeStampedModel):
     status = models.CharField(
         max_length=10, choices=Status.choices, default=Status.IN_PROGRESS
     )
+    storage = models.CharField(
+        max_length=6, choices=Storage.choices, default=Storage.ROWS
+    )
+    # Packed storage only: question snapshots in session order, and answers keyed
+    # by question id
+    packed_questions = models.JSONField(default=list, blank=True)
+    packed_answers = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at", "id"])]
 
     def __str__(self):
         return f"{'Mickey'} - TestSession #{self.pk}"
 
+    @property
+    def is_packed(self):
+        return self.storage == self.Storage.PACKED
+
     @property
     def is_expired(self):
         if not self.started_at or not self.test_assessment.duration_minutes:
@@ -82,6 +102,7 @@ class TestSessionQuestion(TimeStampedModel):
     question = models.ForeignKey("assessments.Question", on_delete=models.CASCADE)
     order = models.PositiveIntegerField()
     snapshot_text = models.TextField()
+    snapshot_type = models.CharField(max_length=4, blank=True)
     snapshot_options = models.JSONField(blank=True, null=True)
 
     class Meta:
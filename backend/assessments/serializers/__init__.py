@@ -8,7 +8,8 @@ from .question import (FIBDetailSerializer, MCQDetailSerializer,
                        PublicOptionSerializer, QuestionDetailsSerializer,
                        QuestionDisplaySerializer, QuestionSerializer,
                        TFDetailSerializer)
-from .session import (StartTestSessionSerializer, TestSessionQuestion,
+from .session import (PackedTestSessionQuestionSerializer,
+                      StartTestSessionSerializer, TestSessionQuestion,
                       TestSessionQuestionSerializer, TestSessionSerializer)
 
 __all__ = [
@@ -29,6 +30,7 @@ __all__ = [
     "StartTestSessionSerializer",
     "TestSessionQuestion",
     "TestSessionQuestionSerializer",
+    "PackedTestSessionQuestionSerializer",
     "SubmitAssessmentSessionSerializer",
     "AsssessmentResultSerializer"
 ]
@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 from categories.serializers import CategorySerializer
 
+from ..caching import get_answer_key
 from ..models import (AssessmentSession, LessonAssessment, Question,
                       TestAssessment, TestSession, AssessmentAnswer, Option)
 from .question import QuestionDisplaySerializer
@@ -95,17 +96,14 @@ class AsssessmentResultSerializer(serializers.ModelSerializer):
         return obj.input
                 
     def get_correct_answer(self, obj):
-        if obj.question.type == "MCQ":
-            correct_option = Option.objects.filter(
-                question=obj.question,
-                is_correct=True
-            ).first()
-
-            # NOTE Warn about no correct answers set
-            return correct_option.text
-        elif obj.question.type == "FIB":
-            return obj.question.correct_answer
-        elif obj.question.type == "TF":
-            return "true" if obj.question.is_true else "false"
+        # Shared with marking; callers serializing many answers pass it in context
+        answer_key = self.context.get("answer_key")
+        if answer_key is None:
+            answer_key = get_answer_key(
+                obj.question.content_type_id, obj.question.object_id
+            )
+        key = answer_key.get(obj.question_id)
+        # NOTE Warn about no correct answers set
+        return key.display if key is not None else None
         
         
\ No newline at end of file
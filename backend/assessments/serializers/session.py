@@ -2,9 +2,8 @@ from rest_framework import serializers
 
 from categories.models import Category
 
-from ..models import TestSession, TestSessionQuestion
+from ..models import Question, TestSession, TestSessionQuestion
 from ..serializers import TestAssessmentSerializer
-from .question import QuestionDisplaySerializer
 
 
 class StartTestSessionSerializer(serializers.Serializer):
@@ -22,6 +21,14 @@ class StartTestSessionSerializer(serializers.Serializer):
         return value
 
 
+def _question_snapshot_representation(order, question_id, type, text, options):
+    # Same shape as QuestionDisplaySerializer, but read from the session's snapshot
+    rep = {"order": order, "id": question_id, "type": type, "text": text}
+    if type == Question.QuestionTypes.MCQ:
+        rep["details"] = {"options": options or []}
+    return rep
+
+
 class TestSessionQuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -31,9 +38,27 @@ class TestSessionQuestionSerializer(serializers.ModelSerializer):
         ]
 
     def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        rep.update(QuestionDisplaySerializer(instance.question).data)
-        return rep
+        return _question_snapshot_representation(
+            instance.order,
+            instance.question_id,
+            instance.snapshot_type,
+            instance.snapshot_text,
+            instance.snapshot_options,
+        )
+
+
+class PackedTestSessionQuestionSerializer(serializers.Serializer):
+    """Renders (order, entry) pairs of `TestSession.packed_questions`."""
+
+    def to_representation(self, instance):
+        order, question = instance
+        return _question_snapshot_representation(
+            order,
+            question["id"],
+            question["type"],
+            question["text"],
+            question["options"],
+        )
 
 
 class TestSessionSerializer(serializers.ModelSerializer):
@@ -2,8 +2,10 @@ import logging
 import random
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
+from django.db.models import F, Prefetch
 from django.utils.timezone import now
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
@@ -17,13 +19,16 @@ from assessments.models import (AssessmentAnswer, AssessmentQuestion,
 from courses.exceptions import NoCourseError, NoLessonError
 from courses.models import Course, CourseProgress, Lesson, LessonProgress
 
+from .caching import get_answer_key, get_question_pool
 from .exceptions import (NoAssessmentSessionError, NoCorrectOptionError,
                          NoCourseAssessmentError, NoLessonAssessmentError,
                          NoQuestionError, NoTestAssessmentError,
                          NoTestBlueprintError, NoTestSessionError,
                          TestSessionExpiredError, TestSessionMarkingError)
-from .serializers import QuestionSerializer, AsssessmentResultSerializer
-
+from .grading import is_correct
+from .serializers import (AsssessmentResultSerializer,
+                          PackedTestSessionQuestionSerializer,
+                          QuestionSerializer, TestSessionQuestionSerializer)
 
 logger = logging.getLogger(__name__)
 TOTAL_QUESTIONS_PER_SESSION = 10
@@ -43,13 +48,6 @@ def start_test_session(user, category, difficulty):
         except TestBlueprint.DoesNotExist:
             raise NoTestBlueprintError
 
-        test_session = TestSession.objects.create(
-            user=user,
-            test_assessment=test_assessment,
-            blueprint=test_blueprint,
-        )
-
-        content_type = ContentType.objects.get_for_model(TestAssessment)
         easy_count = round(
             test_blueprint.rules.get("easy", 0) * TOTAL_QUESTIONS_PER_SESSION
         )
@@ -58,66 +56,115 @@ def start_test_session(user, category, difficulty):
         )
         hard_count = TOTAL_QUESTIONS_PER_SESSION - (easy_count + normal_count)
 
-        questions = list(
-            Question.objects.filter(
-                content_type=content_type,
-                object_id=test_assessment.id,
-            ).order_by("?")
+        selected_ids = []
+        for pool_difficulty, count in (
+            (Question.Difficulties.EASY, easy_count),
+            (Question.Difficulties.NORMAL, normal_count),
+            (Question.Difficulties.HARD, hard_count),
+        ):
+            pool = get_question_pool(test_assessment.id, pool_difficulty)
+            selected_ids += random.sample(pool, min(count, len(pool)))
+        random.shuffle(selected_ids)
+
+        # A question deleted since its pool was cached is simply left out
+        questions = Question.objects.prefetch_related(
+            Prefetch("options", queryset=Option.objects.order_by("id"))
+        ).in_bulk(selected_ids)
+        selected_questions = [questions[pk] for pk in selected_ids if pk in questions]
+
+        test_session = TestSession(
+            user=user,
+            test_assessment=test_assessment,
+            blueprint=test_blueprint,
+            storage=settings.TEST_SESSION_STORAGE,
         )
-
-        questions_easy = [q for q in questions if q.difficulty == "EASY"][:easy_count]
-        questions_normal = [q for q in questions if q.difficulty == "NORMAL"][
-            :normal_count
-        ]
-        questions_hard = [q for q in questions if q.difficulty == "HARD"][:hard_count]
-
-        selected_questions = questions_easy + questions_normal + questions_hard
-        random.shuffle(selected_questions)
-
-        for index, question in enumerate(selected_questions):
-            TestSessionQuestion.objects.create(
-                test_session=test_session,
-                question=question,
-                order=index + 1,
-                snapshot_text=question.text,
+        if test_session.is_packed:
+            test_session.packed_questions = [
+                {
+                    "id": question.id,
+                    "type": question.type,
+                    "text": question.text,
+                    "options": snapshot_question_options(question),
+                }
+                for question in selected_questions
+            ]
+        test_session.save()
+
+        if not test_session.is_packed:
+            TestSessionQuestion.objects.bulk_create(
+                [
+                    TestSessionQuestion(
+                        test_session=test_session,
+                        question=question,
+                        order=index + 1,
+                        snapshot_text=question.text,
+                        snapshot_type=question.type,
+                        snapshot_options=snapshot_question_options(question),
+                    )
+                    for index, question in enumerate(selected_questions)
+                ]
             )
 
         return test_session
 
 
-def mark_test_session(user, session_id):
-    try:
-        test_session = TestSession.objects.get(user=user, id=session_id)
-    except TestSession.DoesNotExist:
-        raise NoTestSessionError()
+def get_test_session_question_data(test_session):
+    if test_session.is_packed:
+        return PackedTestSessionQuestionSerializer(
+            enumerate(test_session.packed_questions, start=1), many=True
+        ).data
+    session_questions = TestSessionQuestion.objects.filter(
+        test_session=test_session
+    ).order_by("order")
+    return TestSessionQuestionSerializer(session_questions, many=True).data
 
-    if test_session.submitted_at:
-        raise TestSessionExpiredError()
 
-    test_session.submitted_at = now()
-    test_session.status = TestSession.Status.SUBMITTED
+def snapshot_question_options(question):
+    """The options a test taker sees, frozen so later edits don't alter the session."""
+    if question.type != Question.QuestionTypes.MCQ:
+        return None
+    return [{"id": option.id, "text": option.text} for option in question.options.all()]
 
-    try:
-        test_session_answers = TestSessionAnswer.objects.filter(
-            session_question__test_session=test_session
-        )
-        with transaction.atomic():
-            for test_answer in test_session_answers:
-                _mark_test_answer(test_answer)
-
-            question_count = test_session.questions.count()
-            correct_answer_count = test_session_answers.filter(is_correct=True).count()
-            score = Decimal(0)
-            if question_count > 0:
-                score = Decimal((correct_answer_count / question_count) * 100)
-            test_session.score = score
-            test_session.marked_at = now()
 
-    except Exception as e:
-        test_session.status = TestSession.Status.ERROR
-        raise TestSessionMarkingError()
+def mark_test_session(user, session_id):
+    # Locked for the whole read-mark-write, so an answer saved concurrently by
+    # save_test_answer can't be overwritten
+    with transaction.atomic():
+        try:
+            test_session = TestSession.objects.select_for_update().get(
+                user=user, id=session_id
+            )
+        except TestSession.DoesNotExist:
+            raise NoTestSessionError()
+
+        if test_session.submitted_at:
+            raise TestSessionExpiredError()
 
-    test_session.save()
+        test_session.submitted_at = now()
+        test_session.status = TestSession.Status.SUBMITTED
+
+        try:
+            with transaction.atomic():
+                if test_session.is_packed:
+                    question_count = len(test_session.packed_questions)
+                    correct_answer_count = _mark_packed_test_answers(test_session)
+                else:
+                    question_count = test_session.questions.count()
+                    correct_answer_count = _mark_test_answers(test_session)
+                score = Decimal(0)
+                if question_count > 0:
+                    score = Decimal((correct_answer_count / question_count) * 100)
+                test_session.score = score
+                test_session.marked_at = now()
+
+        except Exception as e:
+            test_session.status = TestSession.Status.ERROR
+            raise TestSessionMarkingError()
+
+        update_fields = ["submitted_at", "status", "score", "marked_at", "updated_at"]
+        if test_session.is_packed:
+            update_fields.append("packed_answers")
+        test_session.save(update_fields=update_fields)
 
     return test_session
 
@@ -155,11 +202,9 @@ def mark_assessment_session(user, session_id, assessment_id, assessment_type):
     from courses.services import get_next_step, update_lesson_completion
 
     session = None
-    content_type_model = ""
 
     try:
         if assessment_type == "lesson":
-            content_type_model = "lessonassessment"
             session = AssessmentSession.objects.get(
                 user=user,
                 content_type=ContentType.objects.get_for_model(LessonAssessment),
@@ -167,7 +212,6 @@ def mark_assessment_session(user, session_id, assessment_id, assessment_type):
             )
 
         elif assessment_type == "module":
-            content_type_model = "moduleassessment"
             session = AssessmentSession.objects.get(
                 user=user,
                 content_type=ContentType.objects.get_for_model(ModuleAssessment),
@@ -175,7 +219,6 @@ def mark_assessment_session(user, session_id, assessment_id, assessment_type):
             )
 
         elif assessment_type == "course":
-            content_type_model = "courseassessment"
             session = AssessmentSession.objects.get(
                 user=user,
                 content_type=ContentType.objects.get_for_model(CourseAssessment),
@@ -185,15 +228,7 @@ def mark_assessment_session(user, session_id, assessment_id, assessment_type):
         raise NoAssessmentSessionError()
 
     try:
-        session_answers = AssessmentAnswer.objects.filter(session=session)
-        for session_answer in session_answers:
-            _mark_assessment_answer(session_answer)
-
-        question_count = Question.objects.filter(
-            content_type=ContentType.objects.get(model=content_type_model),
-            object_id=assessment_id,
-        ).count()
-        correct_answer_count = session_answers.filter(is_correct=True).count()
+        question_count, correct_answer_count = _mark_assessment_answers(session)
         score = Decimal(0)
         if question_count > 0:
             score = Decimal((correct_answer_count / question_count) * 100)
@@ -207,9 +242,7 @@ def mark_assessment_session(user, session_id, assessment_id, assessment_type):
             resume_lesson_id = ao.lesson_id
         elif isinstance(ao, CourseAssessment):
             last_lesson = (
-                Lesson.objects.filter(module__course=ao.course)
-                .order_by("module__order", "order")
-                .last()
+                Lesson.objects.filter(course=ao.course).order_by("-position").first()
             )
             resume_lesson_id = last_lesson.id
 
@@ -246,8 +279,14 @@ def mark_assessment_session(user, session_id, assessment_id, assessment_type):
 
 def generate_assessment_result(session_id):
     session = AssessmentSession.objects.get(id=session_id)
-    user_answers = AssessmentAnswer.objects.select_related("session").filter(session=session)
-    serializer = AsssessmentResultSerializer(user_answers, many=True)
+    user_answers = AssessmentAnswer.objects.select_related("question").filter(session=session)
+    serializer = AsssessmentResultSerializer(
+        user_answers,
+        many=True,
+        context={
+            "answer_key": get_answer_key(session.content_type_id, session.object_id)
+        },
+    )
     return {
         "score": session.score,
         "correct": AssessmentAnswer.objects.filter(session=session, is_correct=True).count(),
@@ -270,21 +309,26 @@ def start_lesson_assessment(user, lesson_id):
         object_id=lesson_assessment.id,
     )
 
+    # An unfinished attempt is resumed as-is, so starting twice is harmless
+    if not created and not user_lesson_assessment_session.completed_at:
+        return user_lesson_assessment_session
+
     # Delete answers from previous attempts
     if not created:
         AssessmentAnswer.objects.filter(session=user_lesson_assessment_session).delete()
+        user_lesson_assessment_session.completed_at = None
+        user_lesson_assessment_session.save()
 
     # NOTE: Create new answers then update on actual answer selection?
     lesson_assessment_questions = Question.objects.filter(
-        content_type=ContentType.objects.get_for_model(LessonAssessment),
-        object_id=lesson_assessment.id
+        content_type=content_type, object_id=lesson_assessment.id
+    )
+    AssessmentAnswer.objects.bulk_create(
+        [
+            AssessmentAnswer(session=user_lesson_assessment_session, question=question)
+            for question in lesson_assessment_questions
+        ]
     )
-
-    for question in lesson_assessment_questions:
-        AssessmentAnswer.objects.create(
-            session=user_lesson_assessment_session,
-            question=question
-        )
 
     return user_lesson_assessment_session
 
@@ -303,13 +347,28 @@ def start_course_assessment(user, course_slug):
 
 
 def save_test_answer(user, question_id, session_id, answer):
-    question = Question.objects.get(id=question_id)
-    test_session = TestSession.objects.get(id=session_id, user=user)
+    with transaction.atomic():
+        # Locked so concurrent saves to a packed session don't drop each other's answers
+        test_session = (
+            TestSession.objects.select_for_update(of=("self",))
+            .select_related("test_assessment")
+            .get(id=session_id, user=user)
+        )
+        is_expired = test_session.is_expired
+        if not is_expired:
+            if test_session.is_packed:
+                _save_packed_test_answer(test_session, int(question_id), answer)
+            else:
+                _save_test_answer_row(test_session, question_id, answer)
 
-    if test_session.is_expired:
+    if is_expired:
         mark_test_session(user, session_id)
         raise TestSessionExpiredError()
+    return {"success": True, "message": "Answer saved successfully."}
 
+
+def _save_test_answer_row(test_session, question_id, answer):
+    question = Question.objects.get(id=question_id)
     session_question = TestSessionQuestion.objects.get(
         test_session=test_session, question=question
     )
@@ -320,7 +379,22 @@ def save_test_answer(user, question_id, session_id, answer):
     tsa.input = answer if session_question.question.type != "MCQ" else None
     tsa.option_id = answer if session_question.question.type == "MCQ" else None
     tsa.save()
-    return {"success": True, "message": "Answer saved successfully."}
+
+
+def _save_packed_test_answer(test_session, question_id, answer):
+    question = next(
+        (q for q in test_session.packed_questions if q["id"] == question_id), None
+    )
+    if question is None:
+        raise NoQuestionError("Question is not part of this test session")
+
+    is_mcq = question["type"] == Question.QuestionTypes.MCQ
+    test_session.packed_answers[str(question_id)] = {
+        "input": None if is_mcq else answer,
+        "option_id": int(answer) if is_mcq else None,
+        "is_correct": False,
+    }
+    test_session.save(update_fields=["packed_answers", "updated_at"])
 
 
 def save_assessment_answer(user, question_id, answer):
@@ -345,82 +419,51 @@ def save_assessment_answer(user, question_id, answer):
     return {"success": True, "message": "Answer saved successfully."}
 
 
-def _mark_test_answer(test_answer: TestSessionAnswer):
-    question = test_answer.session_question.question
-
-    if question.type == "MCQ":
-        correct_option = Option.objects.get(question=question, is_correct=True)
-        if test_answer.option_id == correct_option.id:
-            test_answer.is_correct = True
-        else:
-            test_answer.is_correct = False
-
-        test_answer.save()
-
-    elif question.type == "FIB":
-        # TODO: Mutate model to allow FIB questions to have multiple allowed answers (besides case-sensitivity)
-
-        correct_answer = question.correct_answer.strip().lower()
-        if test_answer.input:
-            if test_answer.input.strip().lower() == correct_answer:
-                test_answer.is_correct = True
-        else:
-            test_answer.is_correct = False
-
-        test_answer.save()
-
-    elif question.type == "TF":
-        correct_answer = str(question.is_true).lower()
-        if test_answer.input == correct_answer:
-            test_answer.is_correct = True
-        else:
-            test_answer.is_correct = False
-
-        test_answer.save()
-
-    else:
-        logger.error("Invalid question type found: %s" % question.type)
-
-
-def _mark_assessment_answer(assessment_answer: AssessmentAnswer):
-    question = assessment_answer.question
-
-    if question.type == "MCQ":
-        try:
-            correct_option = Option.objects.get(question=question, is_correct=True)
-            if assessment_answer.option_id == correct_option.id:
-                assessment_answer.is_correct = True
-            else:
-                assessment_answer.is_correct = False
-        except Option.DoesNotExist:
-            raise NoCorrectOptionError()
-
-        assessment_answer.save()
+def _get_test_answer_key(test_session):
+    return get_answer_key(
+        ContentType.objects.get_for_model(TestAssessment).id,
+        test_session.test_assessment_id,
+    )
 
-    elif question.type == "FIB":
-        # TODO: Mutate model to allow FIB questions to have multiple allowed answers (besides case-sensitivity)
 
-        correct_answer = question.correct_answer.strip().lower()
-        if assessment_answer.input:
-            if assessment_answer.input.strip().lower() == correct_answer:
-                assessment_answer.is_correct = True
-        else:
-            assessment_answer.is_correct = False
+def _mark_test_answers(test_session):
+    test_answers = list(
+        TestSessionAnswer.objects.filter(
+            session_question__test_session=test_session
+        ).annotate(question_id=F("session_question__question_id"))
+    )
+    answer_keys = _get_test_answer_key(test_session)
+    for test_answer in test_answers:
+        key = answer_keys.get(test_answer.question_id)
+        test_answer.is_correct = key is not None and is_correct(
+            key, test_answer.input, test_answer.option_id
+        )
+    TestSessionAnswer.objects.bulk_update(test_answers, ["is_correct"])
+    return sum(test_answer.is_correct for test_answer in test_answers)
 
-        assessment_answer.save()
 
-    elif question.type == "TF":
-        correct_answer = str(question.is_true).lower()
-        if assessment_answer.input:
-            if assessment_answer.input == correct_answer:
-                assessment_answer.is_correct = True
-        else:
-            assessment_answer.is_correct = False
+def _mark_packed_test_answers(test_session):
+    answers = test_session.packed_answers
+    answer_keys = _get_test_answer_key(test_session)
+    for question_id, answer in answers.items():
+        key = answer_keys.get(int(question_id))
+        answer["is_correct"] = key is not None and is_correct(
+            key, answer["input"], answer["option_id"]
+        )
+    return sum(answer["is_correct"] for answer in answers.values())
 
-        assessment_answer.save()
 
-    else:
-        logger.error("Invalid question type found: %s" % question.type)
+def _mark_assessment_answers(session):
+    answer_keys = get_answer_key(session.content_type_id, session.object_id)
+    session_answers = list(AssessmentAnswer.objects.filter(session=session))
+    for session_answer in session_answers:
+        key = answer_keys.get(session_answer.question_id)
+        session_answer.is_correct = key is not None and is_correct(
+            key, session_answer.input, session_answer.option_id
+        )
+    AssessmentAnswer.objects.bulk_update(session_answers, ["is_correct"])
+    # Every question of the assessment has a key, so it also gives the count
+    return len(answer_keys), sum(answer.is_correct for answer in session_answers)
 
 
 @transaction.atomic
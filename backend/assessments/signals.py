@@ -0,0 +1,30 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import schedule_answer_key_bump, schedule_question_pool_bump
+from .models import Option, Question, TestAssessment
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    if instance.content_type_id is None:
+        return
+    schedule_answer_key_bump(instance.content_type_id, instance.object_id)
+    if instance.content_type_id == ContentType.objects.get_for_model(TestAssessment).id:
+        schedule_question_pool_bump(instance.object_id)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    if Option.question.is_cached(instance):
+        question = (instance.question.content_type_id, instance.question.object_id)
+    else:
+        question = (
+            Question.objects.filter(id=instance.question_id)
+            .values_list("content_type_id", "object_id")
+            .first()
+        )
+    # A question deleted along with its options is handled by question_changed
+    if question is not None and question[0] is not None:
+        schedule_answer_key_bump(*question)
@@ -9,11 +9,11 @@ from rest_framework.views import APIView
 
 from assessments.models import (AssessmentSession, CourseAssessment,
                                 LessonAssessment, TestAssessment,
-                                TestBlueprint, TestSessionQuestion)
+                                TestBlueprint)
 from assessments.serializers import (StartTestSessionSerializer,
-                                     TestAssessmentSerializer,
-                                     TestSessionQuestionSerializer)
-from assessments.services import (start_course_assessment,
+                                     TestAssessmentSerializer)
+from assessments.services import (get_test_session_question_data,
+                                  start_course_assessment,
                                   start_lesson_assessment, start_test_session)
 from core.permissions import IsAdminOrOwner, IsAdminOrReadOnly, IsStudent
 from enrollments.permissions import IsEnrolled
@@ -23,7 +23,7 @@ logger = logging.getLogger(__name__)
 
 class TestAssesmentList(generics.ListAPIView):
     serializer_class = TestAssessmentSerializer
-    queryset = TestAssessment.objects.all()
+    queryset = TestAssessment.objects.select_related("category")
 
 
 class TestAssessmentDetail(generics.RetrieveAPIView):
@@ -64,10 +64,7 @@ class StartTestAssessmentSession(APIView):
                 status=404,
             )
 
-        session_questions = TestSessionQuestion.objects.filter(
-            test_session=test_session
-        )
-        data = TestSessionQuestionSerializer(session_questions, many=True).data
+        data = get_test_session_question_data(test_session)
 
         return Response(
             {
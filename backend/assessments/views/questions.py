@@ -12,7 +12,7 @@ from ..serializers import OptionSerializer, QuestionSerializer
 class QuestionListCreateView(generics.ListCreateAPIView):
     serializer_class = QuestionSerializer
     permission_classes = [IsAdminInstructorOrReadOnly]
-    queryset = Question.objects.all()
+    queryset = Question.objects.prefetch_related("assessment_object")
 
 
 class OptionCreateView(APIView):
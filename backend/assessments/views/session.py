@@ -7,20 +7,22 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from assessments.serializers import (QuestionDisplaySerializer,
-                                     SubmitAssessmentSessionSerializer,
-                                     TestSessionQuestionSerializer)
+                                     SubmitAssessmentSessionSerializer)
+from core.pagination import KeysetPagination
 from core.permissions import IsStudent
 from courses.helpers import get_course_from_object
 
-from ..models import (AssessmentSession, CourseAssessment, LessonAssessment,
-                      Question, TestSession, TestSessionAnswer,
-                      TestSessionQuestion, AssessmentAnswer)
+from ..models import (AssessmentAnswer, AssessmentSession, CourseAssessment,
+                      LessonAssessment, Question, TestSession,
+                      TestSessionAnswer)
 from ..serializers import (SaveAssessmentAnswerSerializer,
                            SaveTestAssessmentAnswerSerializer,
                            TestSessionSerializer)
-from ..services import (update_assessment_answer_objects,
+from ..services import (generate_assessment_result,
+                        get_test_session_question_data,
                         mark_assessment_session, mark_test_session,
-                        save_assessment_answer, save_test_answer, generate_assessment_result)
+                        save_assessment_answer, save_test_answer,
+                        update_assessment_answer_objects)
 
 logger = logging.getLogger(__name__)
 
@@ -32,21 +34,18 @@ class TestSessionDetail(APIView):
             return Response({"error": "Test session ID is required"}, status=400)
 
         try:
-            test_session = TestSession.objects.get(id=test_session_id)
+            test_session = TestSession.objects.select_related("test_assessment").get(
+                id=test_session_id
+            )
         except TestSession.DoesNotExist:
             return Response({"error": "Invalid test session ID"}, status=400)
 
-        if test_session.user != request.user:
+        if test_session.user_id != request.user.id:
             return Response(
                 {"error": "You are not authorized to perform this action"}, status=403
             )
 
-        test_session_questions = TestSessionQuestion.objects.filter(
-            test_session=test_session
-        )
-        test_question_data = TestSessionQuestionSerializer(
-            test_session_questions, many=True
-        ).data
+        test_question_data = get_test_session_question_data(test_session)
 
         data = {
             "started_at": test_session.started_at,
@@ -68,9 +67,16 @@ class TestSessionDetail(APIView):
 class UserTestSessionList(APIView):
     def get(self, request, *args, **kwargs):
         user = request.user
-        test_sessions = TestSession.objects.filter(user=user).order_by("-created_at")
-        serializer = TestSessionSerializer(test_sessions, many=True)
-        return Response(serializer.data)
+        test_sessions = (
+            TestSession.objects.filter(user=user)
+            .select_related("test_assessment__category")
+            .defer("packed_questions", "packed_answers")
+        )
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(test_sessions, request, view=self)
+        serializer = TestSessionSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class SaveTestAssesmentSessionAnswer(APIView):
@@ -11,4 +11,6 @@ class CertificationListView(ListAPIView):
     serializer_class = CertificationSerializer
 
     def get_queryset(self):
-        return Certification.objects.filter(enrollment__user=self.request.user)
+        return Certification.objects.filter(
+            enrollment__user=self.request.user
+        ).select_related("enrollment__course")
@@ -10,7 +10,7 @@ from assessments.exceptions import (NoAssessmentSessionError,
                                     NoTestBlueprintError, NoTestSessionError,
                                     TestSessionExpiredError)
 from courses.exceptions import LessonLockedError
-from enrollments.exceptions import AlreadyEnrolledError
+from enrollments.exceptions import AlreadyEnrolledError, NotEnrolledError
 
 
 def custom_exception_handler(exc, context):
@@ -49,6 +49,9 @@ def custom_exception_handler(exc, context):
     if isinstance(exc, AlreadyEnrolledError):
         return Response({"error": "User already enrolled in this course"}, status=400)
 
+    if isinstance(exc, NotEnrolledError):
+        return Response({"error": "User is not enrolled in this course"}, status=403)
+
     if isinstance(exc, Throttled):
         return Response(
             {
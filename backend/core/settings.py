@@ -171,6 +171,8 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "EXCEPTION_HANDLER": "core.exceptions.custom_exception_handler",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.ScopedRateThrottle",
         "rest_framework.throttling.AnonRateThrottle",
@@ -185,6 +187,13 @@ REST_FRAMEWORK = {
     },
 }
 
+# Upper bound for the ?page_size= a client can ask of a paginated list
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv("PAGINATION_MAX_PAGE_SIZE", "100"))
+
+# How new test sessions store their questions and answers: "ROWS" or "PACKED"
+# (see TestSession.Storage)
+TEST_SESSION_STORAGE = os.getenv("TEST_SESSION_STORAGE", "ROWS")
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
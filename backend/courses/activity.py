@@ -0,0 +1,248 @@
+"""
+Write-behind buffer for learner activity.
+
+Lesson opens and video heartbeats land in Redis hashes instead of the database.
+`flush_activity` (see the management command of the same name) periodically moves
+them into LessonProgress/ModuleProgress/CourseProgress in bulk. Reads that must see
+the latest value check the buffer first and fall back to the database.
+"""
+
+from datetime import datetime
+
+from django.db import transaction
+from django_redis import get_redis_connection
+
+DIRTY_KEY = "activity:dirty"
+USER_POINTER_TIMEOUT = 60 * 60 * 24
+
+# Delete only the fields that still hold the flushed values, so writes that arrive
+# while a flush is in progress survive to the next one.
+_RELEASE_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return redis.call('HLEN', KEYS[1])
+"""
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _lesson_key(enrollment_id, lesson_id):
+    return f"activity:lesson:{enrollment_id}:{lesson_id}"
+
+
+def _module_key(enrollment_id, module_id):
+    return f"activity:module:{enrollment_id}:{module_id}"
+
+
+def _course_key(enrollment_id):
+    return f"activity:course:{enrollment_id}"
+
+
+def _user_key(user_id):
+    return f"activity:user:{user_id}"
+
+
+def _decode(data):
+    return {key.decode(): value.decode() for key, value in data.items()}
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def record_lesson_access(user_id, enrollment_id, lesson, accessed_at):
+    timestamp = accessed_at.isoformat()
+    lesson_key = _lesson_key(enrollment_id, lesson.id)
+    module_key = _module_key(enrollment_id, lesson.module_id)
+    course_key = _course_key(enrollment_id)
+
+    pipe = _redis().pipeline(transaction=False)
+    pipe.hset(lesson_key, "last_accessed_at", timestamp)
+    pipe.hset(module_key, "last_accessed_at", timestamp)
+    pipe.hset(
+        course_key,
+        mapping={"last_accessed_at": timestamp, "last_accessed_lesson": lesson.id},
+    )
+    pipe.sadd(DIRTY_KEY, lesson_key, module_key, course_key)
+    # Read-side pointer to the user's most recent course; not flushed anywhere
+    pipe.hset(
+        _user_key(user_id),
+        mapping={"enrollment": enrollment_id, "last_accessed_at": timestamp},
+    )
+    pipe.expire(_user_key(user_id), USER_POINTER_TIMEOUT)
+    pipe.execute()
+
+
+def record_video_progress(enrollment_id, lesson_id, seconds):
+    key = _lesson_key(enrollment_id, lesson_id)
+    pipe = _redis().pipeline(transaction=False)
+    pipe.hset(key, "progress", int(seconds))
+    pipe.sadd(DIRTY_KEY, key)
+    pipe.execute()
+
+
+def get_buffered_video_progress(enrollment_id, lesson_id):
+    value = _redis().hget(_lesson_key(enrollment_id, lesson_id), "progress")
+    return int(value) if value is not None else None
+
+
+def get_buffered_course_activity(enrollment_id):
+    """Returns (last_accessed_at, last_accessed_lesson_id) or None."""
+    data = _decode(_redis().hgetall(_course_key(enrollment_id)))
+    if not data.get("last_accessed_at"):
+        return None
+    return _parse_time(data["last_accessed_at"]), int(data["last_accessed_lesson"])
+
+
+def get_buffered_course_activities(enrollment_ids):
+    """`get_buffered_course_activity` for several enrollments, by enrollment id."""
+    pipe = _redis().pipeline(transaction=False)
+    for enrollment_id in enrollment_ids:
+        pipe.hgetall(_course_key(enrollment_id))
+    activities = {}
+    for enrollment_id, data in zip(enrollment_ids, pipe.execute()):
+        data = _decode(data)
+        if data.get("last_accessed_at"):
+            activities[enrollment_id] = (
+                _parse_time(data["last_accessed_at"]),
+                int(data["last_accessed_lesson"]),
+            )
+    return activities
+
+
+def get_buffered_last_enrollment_id(user_id):
+    value = _redis().hget(_user_key(user_id), "enrollment")
+    return int(value) if value is not None else None
+
+
+def _upsert(model, rows, unique_fields):
+    # Rows only overwrite the fields they carry, so group them by field set
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for fields, group in groups.items():
+        update_fields = [field for field in fields if field not in unique_fields]
+        model.objects.bulk_create(
+            [model(**row) for row in group],
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+
+
+def _existing_targets(entries):
+    """The lesson and module ids referenced by `entries` that still exist."""
+    from .models import Lesson, Module
+
+    lesson_ids, module_ids = set(), set()
+    for key, data in entries:
+        _, kind, *ids = key.split(":")
+        if kind == "lesson":
+            lesson_ids.add(int(ids[1]))
+        elif kind == "module":
+            module_ids.add(int(ids[1]))
+        elif data.get("last_accessed_lesson"):
+            lesson_ids.add(int(data["last_accessed_lesson"]))
+    return (
+        set(Lesson.objects.filter(id__in=lesson_ids).values_list("id", flat=True)),
+        set(Module.objects.filter(id__in=module_ids).values_list("id", flat=True)),
+    )
+
+
+def _to_rows(entries, enrollments, lesson_ids, module_ids):
+    lesson_rows, module_rows, course_rows = [], [], []
+    for key, data in entries:
+        _, kind, *ids = key.split(":")
+        ids = [int(i) for i in ids]
+        if ids[0] not in enrollments:
+            continue
+        user_id, course_id = enrollments[ids[0]]
+        scope = {"user_id": user_id, "course_id": course_id}
+        row = {}
+        if "last_accessed_at" in data:
+            row["last_accessed_at"] = _parse_time(data["last_accessed_at"])
+
+        if kind == "lesson":
+            if ids[1] not in lesson_ids:
+                continue
+            if "progress" in data:
+                row["progress"] = int(data["progress"])
+            lesson_rows.append(
+                {"enrollment_id": ids[0], "lesson_id": ids[1], **scope, **row}
+            )
+        elif kind == "module":
+            if ids[1] not in module_ids:
+                continue
+            module_rows.append(
+                {"enrollment_id": ids[0], "module_id": ids[1], **scope, **row}
+            )
+        elif kind == "course":
+            # A deleted lesson leaves the stored last lesson as it was
+            lesson_id = int(data.get("last_accessed_lesson") or 0)
+            if lesson_id in lesson_ids:
+                row["last_accessed_lesson_id"] = lesson_id
+            course_rows.append({"enrollment_id": ids[0], **row})
+    return lesson_rows, module_rows, course_rows
+
+
+def flush_activity(batch_size=500):
+    """
+    Moves one batch of buffered activity into the progress tables. Returns the
+    number of buffer entries written.
+    """
+    from enrollments.models import Enrollment
+
+    from .models import CourseProgress, LessonProgress, ModuleProgress
+
+    redis = _redis()
+    keys = [key.decode() for key in redis.spop(DIRTY_KEY, batch_size) or []]
+    if not keys:
+        return 0
+
+    pipe = redis.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    entries = [
+        (key, _decode(data)) for key, data in zip(keys, pipe.execute()) if data
+    ]
+
+    enrollment_ids = {int(key.split(":")[2]) for key, _ in entries}
+    lesson_ids, module_ids = _existing_targets(entries)
+    try:
+        with transaction.atomic():
+            # Enrollments, lessons and modules deleted since the activity was
+            # buffered have nothing to update; their entries are dropped rather than
+            # failing the batch. The enrollments stay locked, as reconcile_progress
+            # --fix locks them, so it can't overwrite what this batch writes.
+            enrollments = {
+                enrollment_id: (user_id, course_id)
+                for enrollment_id, user_id, course_id in Enrollment.objects.filter(
+                    id__in=enrollment_ids
+                )
+                .select_for_update()
+                .order_by("id")
+                .values_list("id", "user_id", "course_id")
+            }
+            lesson_rows, module_rows, course_rows = _to_rows(
+                entries, enrollments, lesson_ids, module_ids
+            )
+            _upsert(LessonProgress, lesson_rows, ["enrollment", "lesson"])
+            _upsert(ModuleProgress, module_rows, ["enrollment", "module"])
+            _upsert(CourseProgress, course_rows, ["enrollment"])
+    except Exception:
+        # Every row points at rows that existed a moment ago, so this is transient
+        # (or a lesson deleted mid-flush, which the next attempt drops)
+        redis.sadd(DIRTY_KEY, *keys)
+        raise
+
+    release = redis.register_script(_RELEASE_SCRIPT)
+    for key, data in entries:
+        args = [item for pair in data.items() for item in pair]
+        release(keys=[key], args=args)
+    return len(entries)
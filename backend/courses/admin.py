@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from .models import (Course, CourseLearningPoint, CourseProgress, CourseRating,
                      CourseSkill, Lesson, LessonProgress, Module,
-                     ModuleProgress)
+                     ModuleProgress, Tag)
 
 
 class ModuleModelAdmin(admin.ModelAdmin):
@@ -12,6 +12,8 @@ class ModuleModelAdmin(admin.ModelAdmin):
 
 class LessonModelAdmin(admin.ModelAdmin):
     list_display = ["id", "module__course__title", "__str__", "order"]
+    # The label reads the module's order
+    list_select_related = ["module__course"]
 
 
 class LessonProgressModelAdmin(admin.ModelAdmin):
@@ -23,6 +25,7 @@ admin.site.register(Course)
 admin.site.register(CourseRating)
 admin.site.register(CourseSkill)
 admin.site.register(CourseLearningPoint)
+admin.site.register(Tag)
 admin.site.register(Module, ModuleModelAdmin)
 admin.site.register(LessonProgress, LessonProgressModelAdmin)
 admin.site.register(ModuleProgress)
@@ -0,0 +1,355 @@
+import hashlib
+import time
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+COURSE_CACHE_TIMEOUT = 60 * 60 * 24
+# Short enough that the enrollment count in the outline doesn't drift far
+COURSE_OUTLINE_TIMEOUT = 60 * 10
+CATALOG_PAGE_TIMEOUT = 60 * 5
+CATALOG_VERSION_KEY = "course_catalog_version"
+NOT_ENROLLED = -1
+
+
+def _course_version_key(course_id):
+    return f"course_version_{course_id}"
+
+
+def get_course_version(course_id):
+    """
+    Every cached structure derived from a course's content is keyed by this
+    version, so bumping it invalidates all of them at once.
+    """
+    return _get_version(_course_version_key(course_id))
+
+
+def _get_version(key, timeout=None):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout)
+        version = cache.get(key)
+    return version
+
+
+def bump_course_version(course_id):
+    # The catalog lists every course, so any content change invalidates it too
+    version = time.time_ns()
+    cache.set_many(
+        {_course_version_key(course_id): version, CATALOG_VERSION_KEY: version}, None
+    )
+
+
+def schedule_course_version_bump(course_id):
+    # Bump after commit so readers can't re-cache pre-commit rows under the new version
+    transaction.on_commit(lambda: bump_course_version(course_id))
+
+
+class LessonIndex:
+    """Ordered lesson ids of a course and their positions in that order."""
+
+    def __init__(self, lesson_ids):
+        self.lesson_ids = lesson_ids
+        self.positions = {lesson_id: pos for pos, lesson_id in enumerate(lesson_ids)}
+
+    def __len__(self):
+        return len(self.lesson_ids)
+
+    def position(self, lesson_id):
+        return self.positions.get(lesson_id)
+
+    @property
+    def first_lesson_id(self):
+        return self.lesson_ids[0] if self.lesson_ids else None
+
+
+class Step(NamedTuple):
+    type: str
+    id: int
+    lesson_id: int
+    title: str
+
+
+class CourseSequence:
+    """
+    The order a learner moves through a course: every lesson, each followed by its
+    assessment when it has one.
+    """
+
+    def __init__(self, steps, module_ids, module_lesson_counts):
+        self.steps = steps
+        self.module_ids = module_ids
+        self.module_lesson_counts = module_lesson_counts
+        self.positions = {(step.type, step.id): pos for pos, step in enumerate(steps)}
+        self.lesson_index = LessonIndex(
+            [step.id for step in steps if step.type == "lesson"]
+        )
+
+    def position(self, step_type, step_id):
+        return self.positions.get((step_type, step_id))
+
+    def step_at(self, pos):
+        if pos is None or not 0 <= pos < len(self.steps):
+            return None
+        return self.steps[pos]
+
+    def next_step(self, pos):
+        return self.step_at(pos + 1)
+
+    def previous_step(self, pos):
+        return self.step_at(pos - 1)
+
+
+def _build_course_sequence(course_id):
+    from assessments.models import LessonAssessment
+
+    from .models import Lesson, Module
+
+    module_ids = list(
+        Module.objects.filter(course_id=course_id)
+        .order_by("order")
+        .values_list("id", flat=True)
+    )
+    # The module is read for each step's title
+    lessons = (
+        Lesson.objects.filter(course_id=course_id)
+        .select_related("module")
+        .order_by("position")
+    )
+    assessments = {
+        assessment.lesson_id: assessment
+        for assessment in LessonAssessment.objects.filter(
+            lesson__course_id=course_id
+        ).select_related("lesson__course")
+    }
+
+    steps = []
+    module_lesson_counts = dict.fromkeys(module_ids, 0)
+    for lesson in lessons:
+        module_lesson_counts[lesson.module_id] += 1
+        steps.append(Step("lesson", lesson.id, lesson.id, str(lesson)))
+        assessment = assessments.get(lesson.id)
+        if assessment:
+            steps.append(Step("assessment", assessment.id, lesson.id, str(assessment)))
+    return CourseSequence(steps, module_ids, module_lesson_counts)
+
+
+def get_course_sequence(course_id):
+    key = f"course_sequence_{course_id}_{get_course_version(course_id)}"
+    sequence = cache.get(key)
+    if sequence is None:
+        sequence = _build_course_sequence(course_id)
+        cache.set(key, sequence, COURSE_CACHE_TIMEOUT)
+    return sequence
+
+
+def _course_outline_key(course_id):
+    return f"course_outline_{course_id}"
+
+
+def get_course_outline(course_id, build):
+    """
+    Returns the user-independent course detail document, calling `build()` to
+    render it again once the course version has moved on. The version and the
+    document come back in a single round trip.
+    """
+    version_key = _course_version_key(course_id)
+    outline_key = _course_outline_key(course_id)
+    cached = cache.get_many([version_key, outline_key])
+    entry = cached.get(outline_key)
+    if entry is not None and entry[0] == cached.get(version_key):
+        return entry[1]
+
+    # Read the version before building, so a bump mid-build leaves a stale entry
+    version = get_course_version(course_id)
+    outline = build()
+    cache.set(outline_key, (version, outline), COURSE_OUTLINE_TIMEOUT)
+    return outline
+
+
+def _course_slug_key(slug):
+    return f"course_slug_{slug}"
+
+
+def get_course_id_for_slug(slug):
+    from .models import Course
+
+    key = _course_slug_key(slug)
+    course_id = cache.get(key)
+    if course_id is None:
+        course_id = (
+            Course.objects.filter(slug=slug).values_list("id", flat=True).first()
+        )
+        if course_id is not None:
+            cache.set(key, course_id, COURSE_CACHE_TIMEOUT)
+    return course_id
+
+
+def forget_course_slug(slug):
+    cache.delete(_course_slug_key(slug))
+
+
+def _catalog_user_key(user_id):
+    return f"course_catalog_user_{user_id}"
+
+
+def get_catalog_page(user, query_params, build):
+    """
+    Returns a cached catalog page for `user` and the request's query string,
+    calling `build()` on a miss. Pages for signed-in users also depend on their
+    enrollments, which `invalidate_catalog_pages` accounts for.
+    """
+    viewer = "anon"
+    if user.is_authenticated:
+        user_version = _get_version(_catalog_user_key(user.id), COURSE_CACHE_TIMEOUT)
+        viewer = f"{user.id}_{user_version}"
+    query = hashlib.md5(query_params.urlencode().encode()).hexdigest()
+    key = f"course_catalog_{_get_version(CATALOG_VERSION_KEY)}_{viewer}_{query}"
+
+    page = cache.get(key)
+    if page is None:
+        page = build()
+        cache.set(key, page, CATALOG_PAGE_TIMEOUT)
+    return page
+
+
+def get_tag_facets():
+    """
+    Course counts per tag, busiest first. Cached under the catalog version, which
+    every course change (tag changes included) moves on.
+    """
+    from django.db.models import Count
+
+    from .models import Tag
+
+    key = f"course_tag_facets_{_get_version(CATALOG_VERSION_KEY)}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = list(
+            Tag.objects.annotate(course_count=Count("course_tags"))
+            .filter(course_count__gt=0)
+            .order_by("-course_count", "name")
+            .values("name", "slug", "course_count")
+        )
+        cache.set(key, facets, COURSE_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_catalog_pages(user_ids):
+    keys = [_catalog_user_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_lesson_index(course_id):
+    return get_course_sequence(course_id).lesson_index
+
+
+def _progress_version_key(user_id, course_id):
+    return f"lesson_bits_version_{user_id}_{course_id}"
+
+
+def _progress_bits_key(user_id, course_id):
+    progress_version = _get_version(
+        _progress_version_key(user_id, course_id), COURSE_CACHE_TIMEOUT
+    )
+    return (
+        f"lesson_bits_{user_id}_{course_id}_{get_course_version(course_id)}_"
+        f"{progress_version}"
+    )
+
+
+def _build_progress_bits(user_id, course_id, index):
+    from enrollments.models import Enrollment
+
+    from .models import LessonProgress
+
+    completed_ids = LessonProgress.objects.filter(
+        user_id=user_id, course_id=course_id, completed_at__isnull=False
+    ).values_list("lesson_id", flat=True)
+
+    bits = 0
+    for lesson_id in completed_ids:
+        pos = index.position(lesson_id)
+        if pos is not None:
+            bits |= 1 << pos
+
+    if not bits:
+        if not Enrollment.objects.filter(user_id=user_id, course_id=course_id).exists():
+            return NOT_ENROLLED
+    return bits
+
+
+def invalidate_progress_state(user_id, course_id):
+    invalidate_progress_states([user_id], course_id)
+
+
+def invalidate_progress_states(user_ids, course_id):
+    # Bumped rather than deleted: a reader that missed before the commit could
+    # otherwise cache the old bits again after the delete
+    def bump():
+        version = time.time_ns()
+        cache.set_many(
+            {
+                _progress_version_key(user_id, course_id): version
+                for user_id in user_ids
+            },
+            COURSE_CACHE_TIMEOUT,
+        )
+
+    transaction.on_commit(bump)
+
+
+class CourseProgressState:
+    """
+    A user's completed lessons in a course as a bitset over the course's LessonIndex.
+
+    Bit N is set when the lesson at position N is completed. `completed_bits` is None
+    when the user isn't enrolled in the course.
+    """
+
+    def __init__(self, index, completed_bits):
+        self.index = index
+        self.completed_bits = completed_bits
+
+    @property
+    def is_enrolled(self):
+        return self.completed_bits is not None
+
+    def is_completed(self, lesson_id):
+        pos = self.index.position(lesson_id)
+        if pos is None or not self.is_enrolled:
+            return False
+        return bool(self.completed_bits >> pos & 1)
+
+    def is_unlocked(self, lesson_id):
+        # Nothing is tracked for users outside the course, so nothing blocks them
+        if not self.is_enrolled:
+            return True
+
+        pos = self.index.position(lesson_id)
+        if pos is None:
+            return False
+        mask = (1 << pos) - 1
+        return self.completed_bits & mask == mask
+
+    def first_incomplete_lesson_id(self):
+        bits = self.completed_bits or 0
+        pos = (~bits & (bits + 1)).bit_length() - 1
+        if pos < len(self.index):
+            return self.index.lesson_ids[pos]
+        return None
+
+
+def get_progress_state(user, course_id):
+    index = get_lesson_index(course_id)
+    if not user.is_authenticated:
+        return CourseProgressState(index, None)
+
+    key = _progress_bits_key(user.id, course_id)
+    bits = cache.get(key)
+    if bits is None:
+        bits = _build_progress_bits(user.id, course_id, index)
+        cache.set(key, bits, COURSE_CACHE_TIMEOUT)
+
+    return CourseProgressState(index, None if bits == NOT_ENROLLED else bits)
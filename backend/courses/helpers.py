@@ -11,7 +11,7 @@ def get_course_from_object(obj):
     elif isinstance(obj, Module):
         return obj.module
     elif isinstance(obj, Lesson):
-        return obj.module.course
+        return obj.course
     elif isinstance(obj, LessonAssessment):
         return obj.lesson.module.course
     elif isinstance(obj, CourseAssessment):
@@ -36,7 +36,7 @@ def resolve_course_from_kwargs(kwargs):
 
     if "lesson_id" in kwargs:
         lesson = get_object_or_404(Lesson, id=kwargs["lesson_id"])
-        return lesson.module.course
+        return lesson.course
 
     if "assessment_id" in kwargs:
         assessment = get_object_or_404(LessonAssessment, pk=kwargs["assessment_id"])
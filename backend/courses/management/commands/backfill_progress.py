@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.services import (PROGRESS_CHUNK_SIZE, backfill_progress_rows,
+                              iter_enrollment_chunks)
+from enrollments.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert missing lesson and module progress rows for existing enrollments, "
+        "in chunks of enrollments. Resume an interrupted run with --start-after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, help="Only backfill this course")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=PROGRESS_CHUNK_SIZE,
+            help="Enrollments per transaction",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=0,
+            help="Skip enrollments up to and including this ID",
+        )
+
+    def handle(self, *args, **options):
+        course_id = options["course"]
+        enrollments = Enrollment.objects.all()
+        if course_id:
+            enrollments = enrollments.filter(course_id=course_id)
+
+        total = 0
+        for after_id, up_to_id in iter_enrollment_chunks(
+            enrollments, options["chunk_size"], options["start_after"]
+        ):
+            with transaction.atomic():
+                inserted = backfill_progress_rows(after_id, up_to_id, course_id)
+            total += inserted
+            self.stdout.write(f"Enrollments {after_id + 1}-{up_to_id}: {inserted} rows")
+
+        self.stdout.write(self.style.SUCCESS(f"Inserted {total} progress rows"))
@@ -0,0 +1,53 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.services import (BulkEnrollStatus, bulk_enroll_users,
+                              read_user_identifiers)
+
+
+class Command(BaseCommand):
+    help = "Enroll a cohort of users, given by ID or email, in a course"
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id", type=int)
+        parser.add_argument("users", nargs="*", help="User IDs or emails")
+        parser.add_argument(
+            "--file",
+            type=str,
+            help="CSV file with a user ID or email in the first column",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options["course_id"])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course with ID {options['course_id']} not found.")
+
+        identifiers = list(options["users"])
+        if options["file"]:
+            try:
+                with open(options["file"], newline="", encoding="utf-8-sig") as f:
+                    identifiers += read_user_identifiers(f)
+            except OSError as e:
+                raise CommandError(f"Error reading {options['file']}: {e}")
+
+        if not identifiers:
+            raise CommandError("No users given.")
+
+        results = bulk_enroll_users(course, identifiers)
+
+        for result in results:
+            if result["status"] in (
+                BulkEnrollStatus.NOT_FOUND,
+                BulkEnrollStatus.NOT_STUDENT,
+            ):
+                self.stderr.write(f"{result['user']}: {result['status']}")
+
+        summary = Counter(result["status"] for result in results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{count} {status}" for status, count in summary.items())
+            )
+        )
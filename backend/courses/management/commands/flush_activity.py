@@ -0,0 +1,54 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.activity import flush_activity
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write buffered lesson access and video progress into the progress tables. "
+        "Runs once, or continuously with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Buffer entries written per batch",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between flushes; 0 flushes once and exits",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+
+        while True:
+            flushed = 0
+            while True:
+                try:
+                    count = flush_activity(batch_size=batch_size)
+                except Exception:
+                    if not interval:
+                        raise
+                    # The batch's keys are back in the dirty set; retry next round
+                    logger.exception("Failed to flush buffered activity")
+                    break
+                flushed += count
+                if count < batch_size:
+                    break
+
+            if flushed or not interval:
+                self.stdout.write(f"Flushed {flushed} activity entries")
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,69 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from courses.reconciliation import reconcile_chunk
+from courses.services import PROGRESS_CHUNK_SIZE, iter_enrollment_chunks
+from enrollments.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute module/course completion, last-accessed data and enrollment "
+        "counters from lesson progress, report drift, and repair it with --fix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, help="Only reconcile this course")
+        parser.add_argument(
+            "--fix", action="store_true", help="Overwrite drifted values"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=PROGRESS_CHUNK_SIZE,
+            help="Enrollments per batch",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=0,
+            help="Skip enrollments up to and including this ID",
+        )
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options["course"]:
+            enrollments = enrollments.filter(course_id=options["course"])
+
+        totals = Counter()
+        for after_id, up_to_id in iter_enrollment_chunks(
+            enrollments, options["chunk_size"], options["start_after"]
+        ):
+            discrepancies = reconcile_chunk(
+                after_id, up_to_id, course_id=options["course"], fix=options["fix"]
+            )
+            totals.update(discrepancy.kind for discrepancy in discrepancies)
+
+            if options["verbosity"] > 1:
+                for discrepancy in discrepancies:
+                    self.stdout.write(
+                        f"{discrepancy.kind}: enrollment {discrepancy.enrollment_id}, "
+                        f"{discrepancy.object_id}: {discrepancy.stored} -> "
+                        f"{discrepancy.expected}"
+                    )
+            self.stdout.write(
+                f"Enrollments {after_id + 1}-{up_to_id}: "
+                f"{len(discrepancies)} discrepancies"
+            )
+
+        if not totals:
+            self.stdout.write(self.style.SUCCESS("No discrepancies found"))
+            return
+
+        for kind, count in sorted(totals.items()):
+            self.stdout.write(f"{kind}: {count}")
+        verb = "Fixed" if options["fix"] else "Found"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {sum(totals.values())} discrepancies")
+        )
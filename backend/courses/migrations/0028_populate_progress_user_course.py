@@ -0,0 +1,36 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+
+def populate_user_and_course(apps, schema_editor):
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+
+    enrollment = Enrollment.objects.filter(pk=OuterRef("enrollment_id"))
+    for model_name in ("LessonProgress", "ModuleProgress"):
+        model = apps.get_model("courses", model_name)
+        last_id = model.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        # Each batch commits on its own, so a large table isn't one long transaction
+        for after_id in range(0, last_id, BATCH_SIZE):
+            with transaction.atomic():
+                model.objects.filter(
+                    id__gt=after_id, id__lte=after_id + BATCH_SIZE
+                ).update(
+                    user_id=Subquery(enrollment.values("user_id")[:1]),
+                    course_id=Subquery(enrollment.values("course_id")[:1]),
+                )
+
+
+class Migration(migrations.Migration):
+    # The NOT NULL and index changes live in 0029: on PostgreSQL, altering a table
+    # in the same transaction as this UPDATE fails on its pending FK triggers
+    atomic = False
+
+    dependencies = [
+        ("courses", "0027_progress_user_course"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_user_and_course, migrations.RunPython.noop),
+    ]
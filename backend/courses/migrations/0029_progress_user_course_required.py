@@ -0,0 +1,54 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0028_populate_progress_user_course"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lessonprogress",
+            name="course",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="courses.course",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="moduleprogress",
+            name="course",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="courses.course",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lessonprogress",
+            index=models.Index(
+                fields=["user", "course", "completed_at"],
+                include=("lesson",),
+                name="lessonprog_user_course_done",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lessonprogress",
+            index=models.Index(
+                condition=models.Q(("last_accessed_at__isnull", False)),
+                fields=["user", "course", "-last_accessed_at"],
+                include=("lesson",),
+                name="lessonprog_user_course_recent",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="moduleprogress",
+            index=models.Index(
+                fields=["user", "course", "completed_at"],
+                name="moduleprog_user_course_done",
+            ),
+        ),
+    ]
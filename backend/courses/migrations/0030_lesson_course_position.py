@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0029_progress_user_course_required"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lesson",
+            name="course",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="lessons",
+                to="courses.course",
+            ),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="position",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_course_and_position(apps, schema_editor):
+    Lesson = apps.get_model("courses", "Lesson")
+    Module = apps.get_model("courses", "Module")
+
+    Lesson.objects.update(
+        course_id=Subquery(
+            Module.objects.filter(pk=OuterRef("module_id")).values("course_id")[:1]
+        )
+    )
+
+    lessons = []
+    position, course_id = 0, None
+    for lesson in Lesson.objects.order_by("course_id", "module__order", "order").only(
+        "id", "course_id"
+    ):
+        if lesson.course_id != course_id:
+            position, course_id = 0, lesson.course_id
+        position += 1
+        lesson.position = position
+        lessons.append(lesson)
+    Lesson.objects.bulk_update(lessons, ["position"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    # The NOT NULL and index changes live in 0032: on PostgreSQL, altering
+    # courses_lesson in the same transaction as these UPDATEs fails on its pending
+    # FK triggers
+
+    dependencies = [
+        ("courses", "0030_lesson_course_position"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_course_and_position, migrations.RunPython.noop),
+    ]
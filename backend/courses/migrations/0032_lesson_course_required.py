@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0031_populate_lesson_course_position"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lesson",
+            name="course",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="lessons",
+                to="courses.course",
+            ),
+        ),
+        migrations.AlterModelOptions(
+            name="lesson",
+            options={"ordering": ["course_id", "position"]},
+        ),
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(
+                fields=["course", "position"], name="courses_les_course__1e4253_idx"
+            ),
+        ),
+    ]
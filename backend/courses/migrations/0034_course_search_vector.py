@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:24
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Only PostgreSQL has tsvector and GIN; elsewhere search falls back to icontains
+# (see courses.search), so these steps are skipped
+
+CREATE_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS courses_course_search_vector_gin
+ON courses_course USING gin (search_vector)
+"""
+
+DROP_INDEX_SQL = "DROP INDEX IF EXISTS courses_course_search_vector_gin"
+
+BACKFILL_SQL = """
+UPDATE courses_course AS course SET search_vector =
+    setweight(to_tsvector('english', coalesce(course.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(course.tags, '')), 'B')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(skill.name, ' ') FROM courses_courseskill AS skill
+        WHERE skill.course_id = course.id
+    ), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(course.description, '')), 'C')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(point.text, ' ') FROM courses_courselearningpoint AS point
+        WHERE point.course_id = course.id
+    ), '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_INDEX_SQL)
+    schema_editor.execute(BACKFILL_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_INDEX_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0033_created_at_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def split_tags(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    Tag = apps.get_model("courses", "Tag")
+    CourseTag = apps.get_model("courses", "CourseTag")
+
+    # Tags that only differ in case or punctuation share a slug, and so one Tag;
+    # the first spelling seen names it
+    names = {}
+    course_slugs = []
+    courses = Course.objects.exclude(tags="").order_by("id")
+    for course_id, value in courses.values_list("id", "tags"):
+        slugs = set()
+        for name in value.split(","):
+            name = name.strip()[:50]
+            slug = slugify(name)[:50]
+            if slug:
+                names.setdefault(slug, name)
+                slugs.add(slug)
+        course_slugs.append((course_id, slugs))
+
+    Tag.objects.bulk_create(
+        [Tag(name=name, slug=slug) for slug, name in names.items()], batch_size=1000
+    )
+    tag_ids = dict(Tag.objects.values_list("slug", "id"))
+    CourseTag.objects.bulk_create(
+        [
+            CourseTag(course_id=course_id, tag_id=tag_ids[slug])
+            for course_id, slugs in course_slugs
+            for slug in slugs
+        ],
+        batch_size=1000,
+    )
+
+
+def join_tags(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    CourseTag = apps.get_model("courses", "CourseTag")
+
+    tags = {}
+    for course_id, name in CourseTag.objects.order_by("id").values_list(
+        "course_id", "tag__name"
+    ):
+        tags.setdefault(course_id, []).append(name)
+    courses = [
+        Course(id=course_id, tags=", ".join(names)) for course_id, names in tags.items()
+    ]
+    Course.objects.bulk_update(courses, ["tags"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0034_course_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                ("slug", models.SlugField(unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CourseTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="course_tags",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="course_tags",
+                        to="courses.tag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tag", "course"], name="courses_cou_tag_id_3ef733_idx"
+                    )
+                ],
+                "unique_together": {("course", "tag")},
+            },
+        ),
+        migrations.RunPython(split_tags, join_tags),
+        migrations.RemoveField(
+            model_name="course",
+            name="tags",
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="tags",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="courses",
+                through="courses.CourseTag",
+                to="courses.tag",
+            ),
+        ),
+    ]
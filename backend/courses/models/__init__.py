@@ -1,4 +1,5 @@
-from .course import Course, CourseLearningPoint, CourseRating, CourseSkill
+from .course import (Course, CourseLearningPoint, CourseRating, CourseSkill,
+                     CourseTag, Tag)
 from .lesson import Lesson
 from .module import Module
 from .progress import CourseProgress, LessonProgress, ModuleProgress
@@ -1,11 +1,15 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Exists, OuterRef, Prefetch, Subquery
 from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 
 from api.models import TimeStampedModel
 
+from .lesson import Lesson
+from .module import Module
+
 User = get_user_model()
 
 
@@ -18,6 +22,70 @@ class CourseQuerySet(models.QuerySet):
             # TODO Rating system
         )
 
+    def with_card_data(self):
+        """
+        Everything a catalog card shows, loaded in the same query as the courses.
+        Counts are correlated subqueries rather than joins, so they don't multiply.
+        """
+        from enrollments.models import Enrollment
+
+        def course_count(model):
+            return Coalesce(
+                Subquery(
+                    model.objects.filter(course=OuterRef("pk"))
+                    .values("course")
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
+            )
+
+        return (
+            self.select_related("category", "instructor")
+            .only(
+                "id",
+                "title",
+                "slug",
+                "thumbnail",
+                "price",
+                "created_at",
+                "category__title",
+                "instructor__full_name",
+            )
+            .annotate(
+                num_lessons=course_count(Lesson),
+                num_modules=course_count(Module),
+                enrollment_count=course_count(Enrollment),
+                rating_count=Coalesce(0, 0),
+                average_rating=Coalesce(0, 0),
+            )
+        )
+
+    def exclude_enrolled(self, user):
+        from enrollments.models import Enrollment
+
+        if not user.is_authenticated:
+            return self
+        return self.filter(
+            ~Exists(Enrollment.objects.filter(course=OuterRef("pk"), user=user))
+        )
+
+    def with_outline(self):
+        """
+        Loads the module -> lesson -> assessment tree in one query per level, so
+        serializing a course costs the same whatever its size.
+        """
+        lessons = Lesson.objects.select_related("lessonassessment").order_by("position")
+        modules = Module.objects.order_by("order").prefetch_related(
+            Prefetch("lessons", queryset=lessons)
+        )
+        return self.select_related("instructor", "category").prefetch_related(
+            "learning_points",
+            "skills",
+            "tags",
+            Prefetch("modules", queryset=modules),
+        )
+
 
 class Course(TimeStampedModel):
     title = models.CharField(max_length=300)
@@ -29,18 +97,23 @@ class Course(TimeStampedModel):
     )
     thumbnail = models.ImageField(upload_to="course_thumbnails/", blank=True, null=True)
     is_active = models.BooleanField(default=True)
-    tags = models.CharField(
-        max_length=255, blank=True, help_text="Comma-separated values"
+    tags = models.ManyToManyField(
+        "courses.Tag", through="courses.CourseTag", related_name="courses", blank=True
     )
     # rating_count = models.PositiveIntegerField(default=0)
     # average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
     # enrollment_count = models.PositiveBigIntegerField(default=0)
     price = models.DecimalField(max_digits=8, decimal_places=2, default=0.0)
+    # Maintained by courses.search; its GIN index is created in migration 0034
+    search_vector = SearchVectorField(null=True, editable=False)
     objects = CourseQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["slug"])]
+        indexes = [
+            models.Index(fields=["slug"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
 
     def __str__(self):
         return self.title[:50]
@@ -55,9 +128,7 @@ class Course(TimeStampedModel):
 
     @property
     def lesson_count(self):
-        from ..models import Lesson
-
-        return Lesson.objects.filter(module__course=self).count()
+        return self.lessons.count()
 
     @property
     def module_count(self):
@@ -72,6 +143,30 @@ class CourseSkill(models.Model):
         return f"{self.course.title} - {self.name}"
 
 
+class Tag(models.Model):
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class CourseTag(models.Model):
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="course_tags"
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="course_tags")
+
+    class Meta:
+        unique_together = ["course", "tag"]
+        # "Courses tagged X" as an index-only join; the unique index covers the
+        # other direction
+        indexes = [models.Index(fields=["tag", "course"])]
+
+    def __str__(self):
+        return f"{self.course.title} - {self.tag.name}"
+
+
 class CourseLearningPoint(models.Model):
     course = models.ForeignKey(
         Course, on_delete=models.CASCADE, related_name="learning_points"
@@ -18,6 +18,12 @@ class Lesson(models.Model):
     module = models.ForeignKey(
         "courses.Module", on_delete=models.CASCADE, related_name="lessons"
     )
+    # Denormalized from module, with `position` numbering the lessons across the
+    # whole course; kept up to date by courses.services.renumber_lesson_positions
+    course = models.ForeignKey(
+        "courses.Course", on_delete=models.CASCADE, related_name="lessons"
+    )
+    position = models.PositiveIntegerField(default=0)
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     video_file = models.FileField(upload_to="lessons/videos/", blank=True, null=True)
@@ -28,12 +34,30 @@ class Lesson(models.Model):
 
     class Meta:
         unique_together = ["order", "module"]
-        ordering = ["module__order", "order"]
+        ordering = ["course_id", "position"]
+        indexes = [models.Index(fields=["course", "position"])]
 
     def __str__(self):
         return f"{self.module.order}.{self.order} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_placement = instance._placement()
+        return instance
+
+    def _placement(self):
+        return (self.__dict__.get("module_id"), self.__dict__.get("order"))
+
+    @property
+    def placement_changed(self):
+        """Whether module or order changed since the lesson was loaded or saved."""
+        loaded = getattr(self, "_loaded_placement", None)
+        return loaded is None or loaded != self._placement()
+
     def save(self, *args, **kwargs):
+        if self.course_id is None:
+            self.course_id = self.module.course_id
         if self.order is None:
             last_order = (
                 Lesson.objects.filter(module=self.module)
@@ -42,3 +66,4 @@ class Lesson(models.Model):
             )
             self.order = (last_order or 0) + 1
         super().save(*args, **kwargs)
+        self._loaded_placement = self._placement()
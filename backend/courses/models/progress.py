@@ -6,29 +6,67 @@ from courses.models import Lesson, Module
 User = get_user_model()
 
 
-class LessonProgress(models.Model):
+class EnrollmentScopedProgress(models.Model):
+    """
+    Progress rows carry their enrollment's user and course so the hot lookups filter
+    on indexed columns of the row itself instead of joining through enrollment.
+    """
+
     enrollment = models.ForeignKey("enrollments.Enrollment", on_delete=models.CASCADE)
-    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    course = models.ForeignKey(
+        "courses.Course", on_delete=models.CASCADE, related_name="+"
+    )
     completed_at = models.DateTimeField(blank=True, null=True)
     last_accessed_at = models.DateTimeField(blank=True, null=True)
     progress = models.PositiveIntegerField(default=0, blank=True, null=True)
 
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.course_id is None:
+            self.user_id = self.enrollment.user_id
+            self.course_id = self.enrollment.course_id
+        super().save(*args, **kwargs)
+
+
+class LessonProgress(EnrollmentScopedProgress):
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
+
     class Meta:
         unique_together = ["enrollment", "lesson"]
+        indexes = [
+            models.Index(
+                fields=["user", "course", "completed_at"],
+                include=["lesson"],
+                name="lessonprog_user_course_done",
+            ),
+            models.Index(
+                fields=["user", "course", "-last_accessed_at"],
+                include=["lesson"],
+                condition=models.Q(last_accessed_at__isnull=False),
+                name="lessonprog_user_course_recent",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.enrollment.user.email} --> {self.lesson.title} === {'Completed' if self.completed_at else 'Not Completed'}"
 
 
-class ModuleProgress(models.Model):
-    enrollment = models.ForeignKey("enrollments.Enrollment", on_delete=models.CASCADE)
+class ModuleProgress(EnrollmentScopedProgress):
     module = models.ForeignKey(Module, on_delete=models.CASCADE)
-    completed_at = models.DateTimeField(blank=True, null=True)
-    last_accessed_at = models.DateTimeField(blank=True, null=True)
-    progress = models.PositiveIntegerField(default=0, blank=True, null=True)
 
     class Meta:
         unique_together = ["enrollment", "module"]
+        indexes = [
+            models.Index(
+                fields=["user", "course", "completed_at"],
+                name="moduleprog_user_course_done",
+            ),
+        ]
 
 
 class CourseProgress(models.Model):
@@ -0,0 +1,306 @@
+"""
+Rebuilds module and course completion, last-accessed data and the enrollment
+counters from LessonProgress, and reports or repairs whatever has drifted.
+
+Works on one range of enrollment ids at a time (see `iter_enrollment_chunks`),
+reading grouped values rather than model instances.
+"""
+
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+
+from enrollments.models import Enrollment
+
+from .models import (CourseProgress, Lesson, LessonProgress, Module,
+                     ModuleProgress)
+from .services import compute_progress
+
+
+class Discrepancy(NamedTuple):
+    kind: str
+    enrollment_id: int
+    object_id: int
+    stored: object
+    expected: object
+
+
+def _is_completed(value):
+    return value is not None
+
+
+def _load_chunk(after_id, up_to_id, course_id=None, lock=False):
+    in_range = {"enrollment_id__gt": after_id, "enrollment_id__lte": up_to_id}
+    enrollment_filter = {"id__gt": after_id, "id__lte": up_to_id}
+    course_in_range = dict(in_range)
+    if course_id:
+        # Lesson and module progress carry course_id; course progress goes through
+        # its enrollment
+        in_range["course_id"] = course_id
+        enrollment_filter["course_id"] = course_id
+        course_in_range["enrollment__course_id"] = course_id
+
+    last_lesson = (
+        LessonProgress.objects.filter(
+            enrollment=OuterRef("pk"), last_accessed_at__isnull=False
+        )
+        .order_by("-last_accessed_at", "-id")
+        .values("lesson_id")[:1]
+    )
+    enrollments = Enrollment.objects.filter(**enrollment_filter)
+    if lock:
+        # Completions and activity flushes lock their enrollment before writing
+        # progress, so nothing read below can change until the fixes are written
+        enrollments = enrollments.select_for_update(of=("self",)).order_by("id")
+    enrollments = list(
+        enrollments.annotate(last_lesson_id=Subquery(last_lesson)).values(
+            "id",
+            "user_id",
+            "course_id",
+            "completed_lessons",
+            "completed_modules",
+            "progress",
+            "last_lesson_id",
+        )
+    )
+    course_ids = {enrollment["course_id"] for enrollment in enrollments}
+
+    modules_by_course = defaultdict(list)
+    for module_id, course_id in Module.objects.filter(
+        course_id__in=course_ids
+    ).values_list("id", "course_id"):
+        modules_by_course[course_id].append(module_id)
+
+    lesson_totals = dict(
+        Lesson.objects.filter(course_id__in=course_ids)
+        .values("module_id")
+        .annotate(total=Count("id"))
+        .values_list("module_id", "total")
+    )
+
+    # One row per (enrollment, module) the learner has touched
+    lesson_rollup = (
+        LessonProgress.objects.filter(**in_range)
+        .values("enrollment_id", "lesson__module_id")
+        .annotate(
+            completed=Count("id", filter=Q(completed_at__isnull=False)),
+            last_completed_at=Max("completed_at"),
+            last_accessed_at=Max("last_accessed_at"),
+        )
+    )
+
+    stored_modules = {
+        (enrollment_id, module_id): (completed_at, last_accessed_at)
+        for enrollment_id, module_id, completed_at, last_accessed_at in (
+            ModuleProgress.objects.filter(**in_range).values_list(
+                "enrollment_id", "module_id", "completed_at", "last_accessed_at"
+            )
+        )
+    }
+    stored_courses = {
+        row[0]: row[1:]
+        for row in CourseProgress.objects.filter(**course_in_range).values_list(
+            "enrollment_id",
+            "completed_at",
+            "last_accessed_at",
+            "last_accessed_lesson_id",
+        )
+    }
+    return (
+        enrollments,
+        modules_by_course,
+        lesson_totals,
+        lesson_rollup,
+        stored_modules,
+        stored_courses,
+    )
+
+
+def reconcile_chunk(after_id, up_to_id, course_id=None, fix=False):
+    """
+    Compares stored rollups for enrollments with ids in (after_id, up_to_id], in
+    `course_id` when given, with what their LessonProgress rows imply. Returns the
+    discrepancies found; with `fix`, also overwrites the stored values with the
+    expected ones, reading and writing in one transaction with the chunk's
+    enrollments locked.
+
+    Completion is compared by presence, keeping the stored timestamp when both
+    agree a module or course is complete.
+    """
+    if not fix:
+        return _reconcile_chunk(after_id, up_to_id, course_id, fix)
+    with transaction.atomic():
+        return _reconcile_chunk(after_id, up_to_id, course_id, fix)
+
+
+def _reconcile_chunk(after_id, up_to_id, course_id, fix):
+    (
+        enrollments,
+        modules_by_course,
+        lesson_totals,
+        lesson_rollup,
+        stored_modules,
+        stored_courses,
+    ) = _load_chunk(after_id, up_to_id, course_id, lock=fix)
+
+    expected_modules = {}
+    completed_lessons = defaultdict(int)
+    for row in lesson_rollup:
+        key = (row["enrollment_id"], row["lesson__module_id"])
+        total = lesson_totals.get(key[1], 0)
+        completed_at = (
+            row["last_completed_at"] if total and row["completed"] >= total else None
+        )
+        expected_modules[key] = (completed_at, row["last_accessed_at"])
+        completed_lessons[key[0]] += row["completed"]
+
+    scopes = {
+        enrollment["id"]: (enrollment["user_id"], enrollment["course_id"])
+        for enrollment in enrollments
+    }
+    discrepancies = []
+    module_fixes = []
+    for key in expected_modules.keys() | stored_modules.keys():
+        completed_at, last_accessed_at = expected_modules.get(key, (None, None))
+        stored_completed_at, stored_accessed_at = stored_modules.get(key, (None, None))
+
+        if _is_completed(completed_at) == _is_completed(stored_completed_at):
+            completed_at = stored_completed_at
+        else:
+            discrepancies.append(
+                Discrepancy(
+                    "module_completed_at", *key, stored_completed_at, completed_at
+                )
+            )
+        if last_accessed_at != stored_accessed_at:
+            discrepancies.append(
+                Discrepancy(
+                    "module_last_accessed_at",
+                    *key,
+                    stored_accessed_at,
+                    last_accessed_at,
+                )
+            )
+        expected_modules[key] = (completed_at, last_accessed_at)
+        if (completed_at, last_accessed_at) != (
+            stored_completed_at,
+            stored_accessed_at,
+        ):
+            module_fixes.append(
+                ModuleProgress(
+                    enrollment_id=key[0],
+                    user_id=scopes[key[0]][0],
+                    course_id=scopes[key[0]][1],
+                    module_id=key[1],
+                    completed_at=completed_at,
+                    last_accessed_at=last_accessed_at,
+                )
+            )
+
+    course_fixes = []
+    enrollment_fixes = []
+    for enrollment in enrollments:
+        enrollment_id = enrollment["id"]
+        module_ids = modules_by_course[enrollment["course_id"]]
+        module_states = [
+            expected_modules.get((enrollment_id, module_id), (None, None))
+            for module_id in module_ids
+        ]
+        module_completions = [state[0] for state in module_states if state[0]]
+        accessed = [state[1] for state in module_states if state[1]]
+
+        completed_at = (
+            max(module_completions)
+            if module_ids and len(module_completions) == len(module_ids)
+            else None
+        )
+        last_accessed_at = max(accessed) if accessed else None
+        last_lesson_id = enrollment["last_lesson_id"]
+        stored = stored_courses.get(enrollment_id, (None, None, None))
+
+        if _is_completed(completed_at) == _is_completed(stored[0]):
+            completed_at = stored[0]
+        else:
+            discrepancies.append(
+                Discrepancy(
+                    "course_completed_at",
+                    enrollment_id,
+                    enrollment["course_id"],
+                    stored[0],
+                    completed_at,
+                )
+            )
+        for kind, stored_value, value in (
+            ("course_last_accessed_at", stored[1], last_accessed_at),
+            ("course_last_accessed_lesson", stored[2], last_lesson_id),
+        ):
+            if stored_value != value:
+                discrepancies.append(
+                    Discrepancy(
+                        kind,
+                        enrollment_id,
+                        enrollment["course_id"],
+                        stored_value,
+                        value,
+                    )
+                )
+        if (completed_at, last_accessed_at, last_lesson_id) != stored:
+            course_fixes.append(
+                CourseProgress(
+                    enrollment_id=enrollment_id,
+                    completed_at=completed_at,
+                    last_accessed_at=last_accessed_at,
+                    last_accessed_lesson_id=last_lesson_id,
+                )
+            )
+
+        counters = {
+            "completed_lessons": completed_lessons[enrollment_id],
+            "completed_modules": len(module_completions),
+        }
+        counters["progress"] = compute_progress(
+            sum(lesson_totals.get(module_id, 0) for module_id in module_ids),
+            len(module_ids),
+            counters["completed_lessons"],
+            counters["completed_modules"],
+        )
+        changed = False
+        for field, value in counters.items():
+            if enrollment[field] != value:
+                discrepancies.append(
+                    Discrepancy(
+                        field,
+                        enrollment_id,
+                        enrollment["course_id"],
+                        enrollment[field],
+                        value,
+                    )
+                )
+                changed = True
+        if changed:
+            enrollment_fixes.append(Enrollment(id=enrollment_id, **counters))
+
+    if fix:
+        ModuleProgress.objects.bulk_create(
+            module_fixes,
+            update_conflicts=True,
+            unique_fields=["enrollment", "module"],
+            update_fields=["completed_at", "last_accessed_at"],
+        )
+        CourseProgress.objects.bulk_create(
+            course_fixes,
+            update_conflicts=True,
+            unique_fields=["enrollment"],
+            update_fields=[
+                "completed_at",
+                "last_accessed_at",
+                "last_accessed_lesson",
+            ],
+        )
+        Enrollment.objects.bulk_update(
+            enrollment_fixes,
+            ["completed_lessons", "completed_modules", "progress"],
+        )
+    return discrepancies
@@ -0,0 +1,123 @@
+"""
+Course search. On PostgreSQL, courses are matched against `Course.search_vector`, a
+weighted tsvector kept current by `refresh_search_vector`. It has a GIN index, so
+lookups stay index scans however large the catalog grows. Other databases (SQLite
+in tests) get a portable icontains engine that approximates the same weighting.
+
+Both engines annotate `rank`, so results paginate on ("-rank", "-id") either way. The
+rank is a fixed-point integer (see RANK_SCALE): ts_rank returns a float4, which no
+longer compares equal to itself once a cursor has carried it through JSON.
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import (BigIntegerField, Case, Exists, F, OuterRef, Q,
+                              Value, When)
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = "english"
+# Ranks are stored as millionths
+RANK_SCALE = 1_000_000
+
+
+# Title is weighted A, tags and skills B, description and learning points C.
+# Migration 0034 carries its own copy of this statement for the backfill.
+def _update_search_vector_sql():
+    from .models import (Course, CourseLearningPoint, CourseSkill, CourseTag,
+                         Tag)
+
+    return f"""
+UPDATE {Course._meta.db_table} AS course SET search_vector =
+    setweight(to_tsvector(%(config)s, coalesce(course.title, '')), 'A')
+    || setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(tag.name, ' ') FROM {CourseTag._meta.db_table} AS course_tag
+        JOIN {Tag._meta.db_table} AS tag ON tag.id = course_tag.tag_id
+        WHERE course_tag.course_id = course.id
+    ), '')), 'B')
+    || setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(skill.name, ' ') FROM {CourseSkill._meta.db_table} AS skill
+        WHERE skill.course_id = course.id
+    ), '')), 'B')
+    || setweight(to_tsvector(%(config)s, coalesce(course.description, '')), 'C')
+    || setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(point.text, ' ')
+        FROM {CourseLearningPoint._meta.db_table} AS point
+        WHERE point.course_id = course.id
+    ), '')), 'C')
+WHERE course.id = %(course_id)s
+"""
+
+
+# ts_rank's default weights for A, B and C, reused by the fallback engine
+_FALLBACK_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+
+
+def uses_postgres_search():
+    return connection.vendor == "postgresql"
+
+
+def refresh_search_vector(course_id):
+    if not uses_postgres_search():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _update_search_vector_sql(),
+            {"config": SEARCH_CONFIG, "course_id": course_id},
+        )
+
+
+def schedule_search_vector_refresh(course_id):
+    transaction.on_commit(lambda: refresh_search_vector(course_id))
+
+
+def _postgres_search(queryset, text):
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F("search_vector"), query) * RANK_SCALE, BigIntegerField())
+    )
+
+
+def _fallback_search(queryset, text):
+    from .models import CourseLearningPoint, CourseSkill, CourseTag
+
+    terms = text.split()
+    if not terms:
+        return queryset.none()
+
+    rank = Value(0, output_field=BigIntegerField())
+    for term in terms:
+        fields = {
+            "A": Q(title__icontains=term),
+            "B": Exists(
+                CourseTag.objects.filter(
+                    course=OuterRef("pk"), tag__name__icontains=term
+                )
+            )
+            | Exists(
+                CourseSkill.objects.filter(course=OuterRef("pk"), name__icontains=term)
+            ),
+            "C": Q(description__icontains=term)
+            | Exists(
+                CourseLearningPoint.objects.filter(
+                    course=OuterRef("pk"), text__icontains=term
+                )
+            ),
+        }
+        # Every term has to appear somewhere
+        queryset = queryset.filter(fields["A"] | fields["B"] | fields["C"])
+        for weight, condition in fields.items():
+            rank = rank + Case(
+                When(
+                    condition, then=Value(round(_FALLBACK_WEIGHTS[weight] * RANK_SCALE))
+                ),
+                default=Value(0),
+                output_field=BigIntegerField(),
+            )
+    return queryset.annotate(rank=rank)
+
+
+def search_courses(queryset, text):
+    """Narrows `queryset` to courses matching `text`, annotated with a `rank`."""
+    if uses_postgres_search():
+        return _postgres_search(queryset, text)
+    return _fallback_search(queryset, text)
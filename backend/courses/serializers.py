@@ -1,6 +1,7 @@
 import logging
 
 from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
 from rest_framework import serializers
 
 from assessments.models import LessonAssessment
@@ -9,12 +10,62 @@ from categories.serializers import CategorySerializer
 from enrollments.models import Enrollment
 from users.serializers import UserSerializer
 
+from .activity import get_buffered_course_activity
+from .caching import get_progress_state
 from .models import (Course, CourseLearningPoint, CourseProgress, CourseSkill,
                      Lesson, LessonProgress, Module, ModuleProgress)
+from .services import set_course_tags
 
 logger = logging.getLogger(__name__)
 
 
+def get_context_progress_state(context, course_id):
+    """Shares one progress state per course across every serializer using `context`."""
+    states = context.setdefault("progress_states", {})
+    if course_id not in states:
+        states[course_id] = get_progress_state(context["request"].user, course_id)
+    return states[course_id]
+
+
+def is_prefetched(instance, relation):
+    return relation in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def has_lesson_assessment(lesson):
+    # Free when the assessment came in through select_related("lessonassessment")
+    try:
+        return lesson.lessonassessment is not None
+    except LessonAssessment.DoesNotExist:
+        return False
+
+
+def get_resume_lesson_id(user, course_id, state):
+    if user.is_authenticated and state.is_enrolled:
+        last_accessed_lesson = (
+            LessonProgress.objects.filter(
+                enrollment=OuterRef("pk"), last_accessed_at__isnull=False
+            )
+            .order_by("-last_accessed_at")
+            .values("lesson_id")[:1]
+        )
+        enrollment = (
+            Enrollment.objects.filter(user=user, course_id=course_id)
+            .annotate(last_accessed_lesson_id=Subquery(last_accessed_lesson))
+            .values_list("id", "last_accessed_lesson_id")
+            .first()
+        )
+        if enrollment:
+            enrollment_id, last_accessed_lesson_id = enrollment
+            # Recent activity may still be sitting in the write-behind buffer
+            activity = get_buffered_course_activity(enrollment_id)
+            if activity:
+                return activity[1]
+            if last_accessed_lesson_id:
+                return last_accessed_lesson_id
+
+    return state.first_incomplete_lesson_id() or state.index.first_lesson_id
+
+
 class LessonListSerializer(serializers.ModelSerializer):
     is_unlocked = serializers.SerializerMethodField()
     has_assessment = serializers.SerializerMethodField()
@@ -32,44 +83,22 @@ class LessonListSerializer(serializers.ModelSerializer):
         ]
 
     def get_has_assessment(self, obj):
-        return LessonAssessment.objects.filter(lesson=obj).exists()
+        return has_lesson_assessment(obj)
 
     def get_is_unlocked(self, obj):
         user = self.context["request"].user
         if not user.is_authenticated:
             return False
 
-        prev_lessons = Lesson.objects.filter(
-            module=obj.module,
-            order__lt=obj.order,
-        )
-        if prev_lessons.exists():
-            if LessonProgress.objects.filter(
-                enrollment__user=user,
-                lesson__in=prev_lessons,
-                completed_at__isnull=True,
-            ).exists():
-                return False
-
-        prev_modules = Module.objects.filter(
-            course=obj.module.course, order__lt=obj.module.order
-        )
-        if prev_modules.exists():
-            if LessonProgress.objects.filter(
-                enrollment__user=user,
-                lesson__module__in=prev_modules,
-                completed_at__isnull=True,
-            ).exists():
-                return False
-
-        return True
+        state = get_context_progress_state(self.context, obj.course_id)
+        return state.is_unlocked(obj.id)
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
         request = self.context.get("request")
         # logging.info(f"{request.user} --- {instance.module.course.instructor}")
 
-        if request and request.user == instance.module.course.instructor:
+        if request and request.user.id == self._instructor_id(instance):
             if instance.video_file:
                 rep["video_file"] = instance.video_file.url
             elif instance.type == "ARTICLE":
@@ -79,6 +108,12 @@ class LessonListSerializer(serializers.ModelSerializer):
 
         return rep
 
+    def _instructor_id(self, lesson):
+        course = self.context.get("course")
+        if course is not None and course.id == lesson.course_id:
+            return course.instructor_id
+        return lesson.course.instructor_id
+
 
 class LessonSerializer(serializers.ModelSerializer):
     is_completed = serializers.SerializerMethodField()
@@ -110,30 +145,15 @@ class LessonSerializer(serializers.ModelSerializer):
         return None
 
     def get_has_assessment(self, obj):
-        return LessonAssessment.objects.filter(lesson=obj).exists()
+        return has_lesson_assessment(obj)
 
     def get_is_unlocked(self, obj):
-        user = self.context["request"].user
-
-        prev_modules = Module.objects.filter(
-            course=obj.module.course, order__lt=obj.module.order
-        )
-        if prev_modules.exists():
-            if LessonProgress.objects.filter(
-                enrollment__user=user,
-                lesson__module__in=prev_modules,
-                completed_at__isnull=True,
-            ).exists():
-                return False
-
-        return True
+        state = get_context_progress_state(self.context, obj.course_id)
+        return state.is_unlocked(obj.id)
 
     def get_is_completed(self, obj):
-        user = self.context["request"].user
-        is_completed = LessonProgress.objects.filter(
-            enrollment__user=user, lesson=obj, completed_at__isnull=False
-        ).exists()
-        return is_completed
+        state = get_context_progress_state(self.context, obj.course_id)
+        return state.is_completed(obj.id)
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -190,6 +210,27 @@ class ModuleSerializer(serializers.ModelSerializer):
         ).data
 
 
+class LessonOutlineSerializer(serializers.ModelSerializer):
+    """The part of LessonListSerializer that is the same for every learner."""
+
+    has_assessment = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Lesson
+        fields = ["id", "title", "order", "has_assessment", "type", "status"]
+
+    def get_has_assessment(self, obj):
+        return has_lesson_assessment(obj)
+
+
+class ModuleOutlineSerializer(serializers.ModelSerializer):
+    lessons = LessonOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Module
+        fields = ["id", "order", "title", "description", "lessons"]
+
+
 class ModuleCreateSerializer(serializers.ModelSerializer):
     course_id = serializers.CharField()
 
@@ -216,12 +257,10 @@ class ModuleCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         course_id = validated_data.pop("course_id")
         course = Course.objects.get(id=course_id)
-        last_module = course.modules.order_by("order").last()
+        last_order = course.modules.aggregate(Max("order"))["order__max"]
 
         new_module = Module.objects.create(
-            course=course,
-            order=last_module.order + 1 if last_module else 1,
-            **validated_data,
+            course=course, order=(last_order or 0) + 1, **validated_data
         )
         return new_module
 
@@ -268,19 +307,23 @@ class LessonCreateSerializer(serializers.ModelSerializer):
         course_id = validated_data.pop("course_id")
         module = Module.objects.get(id=module_id, course_id=course_id)
 
-        # Get last lesson's order/positon in the module
-        if module.lessons.count() > 0:
-            last_lesson_pos = module.lessons.order_by("order").last().order
-        else:
-            last_lesson_pos = 0
+        last_order = module.lessons.aggregate(Max("order"))["order__max"]
 
         lesson = Lesson.objects.create(
-            module=module, order=last_lesson_pos + 1, **validated_data
+            module=module,
+            course_id=module.course_id,
+            order=(last_order or 0) + 1,
+            **validated_data,
         )
 
         return lesson
 
 
+class OutlineModuleSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    lessons = serializers.ListField(child=serializers.IntegerField())
+
+
 class CourseLearningPointSerializer(serializers.ModelSerializer):
     class Meta:
         model = CourseLearningPoint
@@ -293,6 +336,20 @@ class CourseSkillSerializer(serializers.ModelSerializer):
         fields = ["name"]
 
 
+class TagListField(serializers.Field):
+    """Tag names. Also accepts the comma-separated string the course form posts."""
+
+    def to_representation(self, value):
+        return [tag.name for tag in value.all()]
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.split(",")
+        if not isinstance(data, list):
+            raise serializers.ValidationError("Expected a list of tag names")
+        return [str(name).strip() for name in data if str(name).strip()]
+
+
 class CourseSerializer(serializers.ModelSerializer):
     learning_points = CourseLearningPointSerializer(many=True, read_only=True)
     learning_points_input = serializers.ListField(
@@ -300,6 +357,7 @@ class CourseSerializer(serializers.ModelSerializer):
     )
     skills = CourseSkillSerializer(many=True, required=False)
     skills_input = serializers.ListField(child=serializers.CharField(), write_only=True)
+    tags = TagListField(required=False)
     modules = ModuleSerializer(many=True, read_only=True)
     instructor = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
@@ -309,6 +367,8 @@ class CourseSerializer(serializers.ModelSerializer):
     resume_lesson_id = serializers.SerializerMethodField()
     first_lesson_id = serializers.SerializerMethodField()
     is_enrolled = serializers.SerializerMethodField()
+    lesson_count = serializers.SerializerMethodField()
+    module_count = serializers.SerializerMethodField()
     enrollment_count = serializers.IntegerField(read_only=True)
     rating_count = serializers.IntegerField(read_only=True)
     average_rating = serializers.FloatField(read_only=True)
@@ -352,6 +412,7 @@ class CourseSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         learning_points_data = validated_data.pop("learning_points_input", [])
         skills_data = validated_data.pop("skills_input", [])
+        tags = validated_data.pop("tags", [])
         user = self.context.get("request").user
 
         with transaction.atomic():
@@ -363,11 +424,12 @@ class CourseSerializer(serializers.ModelSerializer):
             for skill in skills_data:
                 CourseSkill.objects.create(course=course, name=skill)
 
+            set_course_tags(course, tags)
+
             return course
 
     def get_is_enrolled(self, obj):
-        user = self.context["request"].user
-        return Enrollment.objects.filter(user=user, course=obj).exists()
+        return get_context_progress_state(self.context, obj.id).is_enrolled
 
     def get_learning_points(self, obj):
         return [lp.text for lp in obj.learning_points.all()]
@@ -376,49 +438,122 @@ class CourseSerializer(serializers.ModelSerializer):
         return [skill.name for skill in obj.skills.all()]
 
     def get_resume_lesson_id(self, obj):
-        user = self.context["request"].user
-        current_lesson_progress = (
-            LessonProgress.objects.filter(
-                enrollment__user=user,
-                enrollment__course=obj,
-                last_accessed_at__isnull=False,
-            )
-            .order_by("-last_accessed_at")
-            .first()
-        )
-        if current_lesson_progress:
-            return current_lesson_progress.lesson.id
+        state = get_context_progress_state(self.context, obj.id)
+        return get_resume_lesson_id(self.context["request"].user, obj.id, state)
 
-        first_lesson = (
-            Lesson.objects.filter(module__course=obj)
-            .order_by("module__order", "order")
+    def first_lesson_id(self, obj):
+        return (
+            Lesson.objects.filter(course=obj)
+            .order_by("position")
+            .values_list("id", flat=True)
             .first()
         )
 
-        return first_lesson.id if first_lesson else None
-
-    def first_lesson_id(self, obj):
-        qs = Lesson.objects.filter(module__course=obj).order_by(
-            "module__order", "order"
-        )
-        if qs.exists():
-            first_lesson = qs.first()
-            return first_lesson.id
-        return None
+    # Both counts read the prefetched outline (see CourseQuerySet.with_outline) when
+    # there is one, and count in the database otherwise
+    def get_lesson_count(self, obj):
+        if is_prefetched(obj, "modules") and all(
+            is_prefetched(module, "lessons") for module in obj.modules.all()
+        ):
+            return sum(len(module.lessons.all()) for module in obj.modules.all())
+        return Lesson.objects.filter(course=obj).count()
 
-    # def get_lesson_count(self, obj):
-    #     return Lesson.objects.filter(module__course=obj).count()
-
-    # def get_module_count(self, obj):
-    #     return obj.modules.count()
+    def get_module_count(self, obj):
+        if is_prefetched(obj, "modules"):
+            return len(obj.modules.all())
+        return Module.objects.filter(course=obj).count()
 
     def to_representation(self, instance):
+        # Lets nested lesson serializers reach the course without a query each
+        self.context["course"] = instance
         rep = super().to_representation(instance)
         rep["learning_points"] = [lp["text"] for lp in rep["learning_points"]]
         rep["skills"] = [skill["name"] for skill in rep["skills"]]
         return rep
 
 
+class CourseOutlineSerializer(CourseSerializer):
+    """
+    CourseSerializer without the per-user fields, cached and shared between
+    learners (see `get_course_outline`). `with_user_overlay` adds them back.
+    """
+
+    modules = ModuleOutlineSerializer(many=True, read_only=True)
+
+    class Meta(CourseSerializer.Meta):
+        fields = [
+            field
+            for field in CourseSerializer.Meta.fields
+            if field not in ("resume_lesson_id", "is_enrolled")
+        ]
+
+
+def with_user_overlay(outline, user):
+    """Merges a cached course outline with `user`'s enrollment and progress."""
+    state = get_progress_state(user, outline["id"])
+    modules = [
+        {
+            **module,
+            "lessons": [
+                {
+                    **lesson,
+                    "is_unlocked": user.is_authenticated
+                    and state.is_unlocked(lesson["id"]),
+                }
+                for lesson in module["lessons"]
+            ],
+        }
+        for module in outline["modules"]
+    ]
+    return {
+        **outline,
+        "modules": modules,
+        "resume_lesson_id": get_resume_lesson_id(user, outline["id"], state),
+        "is_enrolled": state.is_enrolled,
+    }
+
+
+class CourseCardSerializer(serializers.ModelSerializer):
+    """Catalog card for a course annotated by `Course.objects.with_card_data()`."""
+
+    category = serializers.CharField(source="category.title")
+    instructor = serializers.CharField(source="instructor.full_name", default=None)
+    lesson_count = serializers.IntegerField(source="num_lessons")
+    module_count = serializers.IntegerField(source="num_modules")
+    enrollment_count = serializers.IntegerField()
+    rating_count = serializers.IntegerField()
+    average_rating = serializers.FloatField()
+
+    class Meta:
+        model = Course
+        fields = [
+            "id",
+            "title",
+            "slug",
+            "thumbnail",
+            "price",
+            "category",
+            "instructor",
+            "lesson_count",
+            "module_count",
+            "enrollment_count",
+            "rating_count",
+            "average_rating",
+        ]
+
+
+class CourseSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    tag = serializers.SlugField(required=False)
+    category = serializers.IntegerField(required=False)
+    min_price = serializers.DecimalField(
+        max_digits=8, decimal_places=2, min_value=0, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=8, decimal_places=2, min_value=0, required=False
+    )
+
+
 class ThinCourseSerializer(serializers.ModelSerializer):
     category = serializers.CharField(source="category.title")
     average_rating = serializers.FloatField(read_only=True)
@@ -429,81 +564,33 @@ class ThinCourseSerializer(serializers.ModelSerializer):
 
 
 class CourseUserSerializer(serializers.Serializer):
+    """Serializes an Enrollment annotated by `Enrollment.objects.with_dashboard_data()`."""
+
     course = serializers.SerializerMethodField()
     progress = serializers.SerializerMethodField()
-    resume_lesson_id = serializers.SerializerMethodField()
-    last_accessed_at = serializers.SerializerMethodField()
-
-    def get_last_accessed_at(self, obj):
-        request = self.context["request"]
-        course_progress = CourseProgress.objects.get(
-            enrollment__user=request.user, enrollment__course=obj
-        )
-        return course_progress.last_accessed_at
+    resume_lesson_id = serializers.IntegerField()
+    last_accessed_at = serializers.DateTimeField()
 
     def get_course(self, obj):
         request = self.context["request"]
+        course = obj.course
         return {
-            "id": obj.id,
-            "title": obj.title,
-            "category": obj.category.title,
-            "thumbnail": request.build_absolute_uri(obj.thumbnail.url),
-            "slug": obj.slug,
+            "id": course.id,
+            "title": course.title,
+            "category": course.category.title,
+            "thumbnail": (
+                request.build_absolute_uri(course.thumbnail.url)
+                if course.thumbnail
+                else None
+            ),
+            "slug": course.slug,
             "lesson_count": obj.lesson_count,
             "module_count": obj.module_count,
         }
 
     def get_progress(self, obj):
-        user = self.context["request"].user
-
-        module_ids = Module.objects.filter(course_id=obj.id).values_list(
-            "id", flat=True
-        )
-        lesson_ids = Lesson.objects.filter(module_id__in=module_ids).values_list(
-            "id", flat=True
-        )
-        lesson_total = len(lesson_ids)
-        module_total = len(module_ids)
-
-        lesson_completed = LessonProgress.objects.filter(
-            enrollment__user=user, completed_at__isnull=False, lesson_id__in=lesson_ids
-        ).count()
-        module_completed = ModuleProgress.objects.filter(
-            enrollment__user=user, completed_at__isnull=False, module_id__in=module_ids
-        ).count()
-
-        lesson_part = lesson_completed / lesson_total if lesson_total else 0
-        module_part = module_completed / module_total if module_total else 0
-        lesson_weight = 0.7
-        module_weight = 0.3
-
-        total_progress = (lesson_part * lesson_weight) + (module_part * module_weight)
-        total_progress_percentage = round(total_progress * 100, 2)
-
         return {
-            "percentage": total_progress_percentage,
-            "lesson": lesson_completed,
-            "module": module_completed,
+            "percentage": float(obj.progress),
+            "lesson": obj.completed_lessons,
+            "module": obj.completed_modules,
         }
-
-    def get_resume_lesson_id(self, obj):
-        user = self.context["request"].user
-        current_lesson_progress = (
-            LessonProgress.objects.filter(
-                enrollment__user=user,
-                enrollment__course=obj,
-                last_accessed_at__isnull=False,
-            )
-            .order_by("-last_accessed_at")
-            .first()
-        )
-        if current_lesson_progress:
-            return current_lesson_progress.lesson.id
-
-        first_lesson = (
-            Lesson.objects.filter(module__course=obj)
-            .order_by("module__order", "order")
-            .first()
-        )
-
-        return first_lesson.id if first_lesson else None
\ No newline at end of file
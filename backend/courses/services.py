@@ -1,21 +1,50 @@
+import csv
+import io
 import logging
+from decimal import ROUND_HALF_UP, Decimal
 
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import (Count, DecimalField, F, Max, OuterRef, Q,
+                              Subquery, Value)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils.text import slugify
 from django.utils.timezone import now
 
-from assessments.models import LessonAssessment, AssessmentSession
+from assessments.models import AssessmentSession, LessonAssessment
 from assessments.services import start_lesson_assessment
 from certifications.services import issue_certificate
 from courses.exceptions import LessonLockedError
-from courses.models import CourseProgress, LessonProgress, ModuleProgress
-from enrollments.exceptions import AlreadyEnrolledError
+from enrollments.exceptions import AlreadyEnrolledError, NotEnrolledError
 from enrollments.models import Enrollment
 
-from .models import (CourseProgress, Lesson, LessonProgress, Module,
-                     ModuleProgress)
+from .activity import (get_buffered_video_progress, record_lesson_access,
+                       record_video_progress)
+from .caching import (get_course_sequence, get_progress_state,
+                      invalidate_catalog_pages, invalidate_progress_state,
+                      invalidate_progress_states, schedule_course_version_bump)
+from .models import (CourseProgress, CourseTag, Lesson, LessonProgress, Module,
+                     ModuleProgress, Tag)
+from .search import schedule_search_vector_refresh
 
 logger = logging.getLogger(__name__)
+User = get_user_model()
+
+LESSON_PROGRESS_WEIGHT = 0.7
+MODULE_PROGRESS_WEIGHT = 0.3
+BULK_ENROLL_BATCH_SIZE = 1000
+BULK_ENROLL_COPY_THRESHOLD = 5000
+BULK_ENROLL_COPY_BATCH_SIZE = 50000
+PROGRESS_CHUNK_SIZE = 1000
+
+
+class BulkEnrollStatus:
+    ENROLLED = "enrolled"
+    ALREADY_ENROLLED = "already_enrolled"
+    NOT_FOUND = "not_found"
+    NOT_STUDENT = "not_student"
+    INVALID = "invalid"
 
 
 @transaction.atomic
@@ -25,18 +54,163 @@ def enroll_user_in_course(user, course):
 
     # Check if the user has paid for the course - if it's not free, that is
 
+    # Lesson/module progress rows are created on first access or completion; a
+    # missing row means "not started"
     enrollment = Enrollment.objects.create(course=course, user=user)
-    lessons = Lesson.objects.filter(module__course=course)
-    LessonProgress.objects.bulk_create(
-        [LessonProgress(enrollment=enrollment, lesson=lesson) for lesson in lessons]
+    CourseProgress.objects.create(enrollment=enrollment)
+    invalidate_progress_state(user.id, course.id)
+
+
+def read_user_identifiers(lines):
+    """User ids/emails from the first column of CSV lines, skipping any header."""
+    identifiers = []
+    for row in csv.reader(lines):
+        value = row[0].strip() if row else ""
+        if value and value.lower() not in ("id", "email", "user"):
+            identifiers.append(value)
+    return identifiers
+
+
+def _parse_identifier(identifier):
+    """A user id or email from a bulk enrollment entry, or None if it's neither."""
+    if isinstance(identifier, bool):
+        return None
+    if isinstance(identifier, int):
+        return identifier if identifier > 0 else None
+    if isinstance(identifier, str):
+        identifier = identifier.strip()
+        return int(identifier) if identifier.isdecimal() else identifier
+    return None
+
+
+def _resolve_users(identifiers):
+    ids = [identifier for identifier in identifiers if isinstance(identifier, int)]
+    emails = [identifier for identifier in identifiers if isinstance(identifier, str)]
+
+    users = {}
+    for user_id, email, account_type in User.objects.filter(
+        Q(id__in=ids) | Q(email__in=emails)
+    ).values_list("id", "email", "account_type"):
+        users[user_id] = users[email] = (user_id, account_type)
+    return users
+
+
+def _bulk_create_enrollments(course, user_ids):
+    Enrollment.objects.bulk_create(
+        [Enrollment(user_id=user_id, course=course) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    # Enrollments made elsewhere get their CourseProgress in the same transaction,
+    # so the ones still missing it were inserted above
+    created = dict(
+        Enrollment.objects.filter(
+            course=course, user_id__in=user_ids, courseprogress__isnull=True
+        ).values_list("id", "user_id")
     )
+    CourseProgress.objects.bulk_create(
+        [CourseProgress(enrollment_id=enrollment_id) for enrollment_id in created],
+        ignore_conflicts=True,
+    )
+    return set(created.values())
+
 
-    modules = Module.objects.filter(course=course)
-    ModuleProgress.objects.bulk_create(
-        [ModuleProgress(enrollment=enrollment, module=module) for module in modules]
+def _copy_enrollments(course, user_ids):
+    data = io.StringIO("".join(f"{user_id}\n" for user_id in user_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS bulk_enroll_users (user_id bigint) "
+            "ON COMMIT DROP"
+        )
+        cursor.execute("TRUNCATE bulk_enroll_users")
+        cursor.copy_expert("COPY bulk_enroll_users (user_id) FROM STDIN", data)
+        cursor.execute(
+            f"""
+            WITH enrolled AS (
+                INSERT INTO {Enrollment._meta.db_table} (
+                    user_id, course_id, progress, completed_lessons,
+                    completed_modules, created_at, updated_at
+                )
+                SELECT user_id, %s, 0, 0, 0, now(), now() FROM bulk_enroll_users
+                ON CONFLICT (user_id, course_id) DO NOTHING
+                RETURNING id, user_id
+            ), progress AS (
+                INSERT INTO {CourseProgress._meta.db_table} (enrollment_id, progress)
+                SELECT id, 0 FROM enrolled
+            )
+            SELECT user_id FROM enrolled
+            """,
+            [course.id],
+        )
+        return {user_id for (user_id,) in cursor.fetchall()}
+
+
+def bulk_enroll_users(course, identifiers):
+    """
+    Enrolls a cohort of users (ids or emails) in a course, in batches. Large batches
+    on PostgreSQL are streamed in with COPY. Returns one {"user", "status"} result
+    per distinct identifier, and an "invalid" one per entry that is neither.
+    """
+    parsed = {}
+    invalid = []
+    for identifier in identifiers:
+        if isinstance(identifier, str) and not identifier.strip():
+            continue
+        value = _parse_identifier(identifier)
+        if value is None:
+            invalid.append(identifier)
+        else:
+            parsed.setdefault(value, None)
+    identifiers = list(parsed)
+    users = _resolve_users(identifiers)
+
+    candidate_ids = {
+        users[identifier][0]
+        for identifier in identifiers
+        if identifier in users and users[identifier][1] == User.AccountTypes.STUDENT
+    }
+    new_ids = sorted(
+        candidate_ids
+        - set(
+            Enrollment.objects.filter(
+                course=course, user_id__in=candidate_ids
+            ).values_list("user_id", flat=True)
+        )
     )
 
-    CourseProgress.objects.create(enrollment=enrollment)
+    if (
+        connection.vendor == "postgresql"
+        and len(new_ids) >= BULK_ENROLL_COPY_THRESHOLD
+    ):
+        insert, batch_size = _copy_enrollments, BULK_ENROLL_COPY_BATCH_SIZE
+    else:
+        insert, batch_size = _bulk_create_enrollments, BULK_ENROLL_BATCH_SIZE
+
+    enrolled = set()
+    for start in range(0, len(new_ids), batch_size):
+        batch = new_ids[start : start + batch_size]
+        with transaction.atomic():
+            enrolled |= insert(course, batch)
+            invalidate_progress_states(batch, course.id)
+            # bulk inserts skip the Enrollment signals
+            invalidate_catalog_pages(batch)
+
+    results = []
+    for identifier in identifiers:
+        user = users.get(identifier)
+        if user is None:
+            status = BulkEnrollStatus.NOT_FOUND
+        elif user[1] != User.AccountTypes.STUDENT:
+            status = BulkEnrollStatus.NOT_STUDENT
+        elif user[0] in enrolled:
+            status = BulkEnrollStatus.ENROLLED
+        else:
+            status = BulkEnrollStatus.ALREADY_ENROLLED
+        results.append({"user": identifier, "status": status})
+    results += [
+        {"user": identifier, "status": BulkEnrollStatus.INVALID}
+        for identifier in invalid
+    ]
+    return results
 
 
 @transaction.atomic
@@ -44,182 +218,430 @@ def update_lesson_access(user, lesson):
     if not is_lesson_unlocked(user, lesson):
         raise LessonLockedError()
 
-    lesson_progress, created = LessonProgress.objects.get_or_create(
-        enrollment__user=user, lesson=lesson
+    enrollment_id = get_enrollment_id(user, lesson.course_id)
+    record_lesson_access(user.id, enrollment_id, lesson, now())
+
+
+def save_video_progress(user, lesson, seconds):
+    enrollment_id = get_enrollment_id(user, lesson.course_id)
+    record_video_progress(enrollment_id, lesson.id, seconds)
+
+
+def get_video_progress(user, lesson):
+    enrollment_id = get_enrollment_id(user, lesson.course_id)
+    progress = get_buffered_video_progress(enrollment_id, lesson.id)
+    if progress is None:
+        progress = (
+            LessonProgress.objects.filter(enrollment_id=enrollment_id, lesson=lesson)
+            .values_list("progress", flat=True)
+            .first()
+        )
+    return progress or 0
+
+
+def get_enrollment_id(user, course_id):
+    enrollment_id = (
+        Enrollment.objects.filter(user=user, course_id=course_id)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if enrollment_id is None:
+        raise NotEnrolledError()
+    return enrollment_id
+
+
+def _mark_completed(model, completed_at, **lookup):
+    """
+    Conditionally stamps `completed_at` on a progress row, creating it if missing.
+    Returns True only for the call that actually completed it.
+    """
+    if model.objects.filter(completed_at__isnull=True, **lookup).update(
+        completed_at=completed_at
+    ):
+        return True
+    _, created = model.objects.get_or_create(
+        defaults={"completed_at": completed_at}, **lookup
+    )
+    return created
+
+
+def progress_expression(course_id, completed_lessons, completed_modules):
+    """
+    The weighted completion percentage of a course, as a DB expression over
+    completed lesson/module counts.
+    """
+    sequence = get_course_sequence(course_id)
+    lesson_total = len(sequence.lesson_index)
+    module_total = len(sequence.module_ids)
+
+    percentage = Value(0.0)
+    if lesson_total:
+        percentage += completed_lessons * Value(
+            LESSON_PROGRESS_WEIGHT * 100 / lesson_total
+        )
+    if module_total:
+        percentage += completed_modules * Value(
+            MODULE_PROGRESS_WEIGHT * 100 / module_total
+        )
+    return Cast(
+        Round(percentage, 2), output_field=DecimalField(max_digits=5, decimal_places=2)
     )
-    lesson_progress.last_accessed_at = now()
-    lesson_progress.save()
 
-    module = lesson.module
-    module_progress, _ = ModuleProgress.objects.get_or_create(
-        enrollment__user=user, module=module
+
+def compute_progress(lesson_total, module_total, completed_lessons, completed_modules):
+    """The Python twin of progress_expression, for checking stored values."""
+    percentage = 0.0
+    if lesson_total:
+        percentage += completed_lessons * (LESSON_PROGRESS_WEIGHT * 100 / lesson_total)
+    if module_total:
+        percentage += completed_modules * (MODULE_PROGRESS_WEIGHT * 100 / module_total)
+    return Decimal(repr(percentage)).quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+
+def record_enrollment_completion(enrollment, course_id, lessons=0, modules=0):
+    completed_lessons = F("completed_lessons") + lessons
+    completed_modules = F("completed_modules") + modules
+    Enrollment.objects.filter(pk=enrollment.pk).update(
+        completed_lessons=completed_lessons,
+        completed_modules=completed_modules,
+        progress=progress_expression(course_id, completed_lessons, completed_modules),
     )
-    module_progress.last_accessed_at = now()
-    module_progress.save()
 
-    course = module.course
-    course_progress, _ = CourseProgress.objects.get_or_create(
-        enrollment__user=user, enrollment__course=course
+
+def refresh_enrollment_progress(course_id):
+    """
+    Recounts every enrollment in a course from its progress rows, e.g. after lessons
+    or modules are added or removed.
+    """
+
+    def completed_count(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(
+                    enrollment=OuterRef("pk"), completed_at__isnull=False
+                )
+                .values("enrollment")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    progress = progress_expression(
+        course_id, F("completed_lessons"), F("completed_modules")
+    )
+    enrollments = Enrollment.objects.filter(course_id=course_id)
+
+    # One short transaction per chunk, so no update holds every enrollment's lock
+    for after_id, up_to_id in iter_enrollment_chunks(enrollments):
+        chunk = enrollments.filter(id__gt=after_id, id__lte=up_to_id)
+        with transaction.atomic():
+            chunk.update(
+                completed_lessons=completed_count(LessonProgress),
+                completed_modules=completed_count(ModuleProgress),
+            )
+            chunk.update(progress=progress)
+
+
+def schedule_enrollment_progress_refresh(course_id):
+    transaction.on_commit(lambda: refresh_enrollment_progress(course_id))
+
+
+def set_course_tags(course, names):
+    """
+    Replaces the course's tags with `names`, creating tags that don't exist yet.
+    Names that slugify the same are one tag.
+    """
+    wanted = {}
+    for name in names:
+        name = name.strip()[: Tag._meta.get_field("name").max_length]
+        slug = slugify(name)[: Tag._meta.get_field("slug").max_length]
+        if slug:
+            wanted.setdefault(slug, name)
+
+    Tag.objects.bulk_create(
+        [Tag(name=name, slug=slug) for slug, name in wanted.items()],
+        ignore_conflicts=True,
+    )
+    tag_ids = list(Tag.objects.filter(slug__in=wanted).values_list("id", flat=True))
+    CourseTag.objects.filter(course=course).exclude(tag_id__in=tag_ids).delete()
+    CourseTag.objects.bulk_create(
+        [CourseTag(course=course, tag_id=tag_id) for tag_id in tag_ids],
+        ignore_conflicts=True,
+    )
+    schedule_course_version_bump(course.id)
+    schedule_search_vector_refresh(course.id)
+
+
+def renumber_lesson_positions(course_id):
+    """
+    Renumbers the course-wide `position` of a course's lessons from module and
+    in-module order, writing only the lessons whose position changed.
+    """
+    lessons = (
+        Lesson.objects.filter(course_id=course_id)
+        .order_by("module__order", "order")
+        .values_list("id", "position")
+    )
+    Lesson.objects.bulk_update(
+        [
+            Lesson(id=lesson_id, position=position)
+            for position, (lesson_id, current) in enumerate(lessons, start=1)
+            if current != position
+        ],
+        ["position"],
     )
-    course_progress.last_accessed_at = now()
-    course_progress.last_accessed_lesson = lesson
-    course_progress.save()
 
 
 @transaction.atomic
-def update_lesson_completion(user, lesson):
-    user_lesson_progress = LessonProgress.objects.get(
-        enrollment__user=user, lesson=lesson
+def reorder_course_outline(course, outline):
+    """
+    Applies a full ordering of a course's modules and lessons, given as
+    [{"id": module_id, "lessons": [lesson_id, ...]}, ...] in display order. Lessons
+    may move between modules. Raises ValueError unless every module and lesson of
+    the course appears exactly once.
+    """
+    if not all(
+        isinstance(entry, dict)
+        and "id" in entry
+        and isinstance(entry.get("lessons"), list)
+        for entry in outline
+    ):
+        raise ValueError('Outline entries must be {"id": ..., "lessons": [...]}')
+
+    module_ids = [entry["id"] for entry in outline]
+    lesson_ids = [lesson_id for entry in outline for lesson_id in entry["lessons"]]
+
+    modules = Module.objects.filter(course=course).select_for_update()
+    if sorted(module_ids) != sorted(modules.values_list("id", flat=True)):
+        raise ValueError("Outline must list every module of the course exactly once")
+    lessons = Lesson.objects.filter(course=course)
+    if sorted(lesson_ids) != sorted(lessons.values_list("id", flat=True)):
+        raise ValueError("Outline must list every lesson of the course exactly once")
+
+    # Shift every order out of the way first, so the bulk updates below can't
+    # collide with an existing (order, module) pair midway through
+    module_offset = max(
+        modules.aggregate(Max("order"))["order__max"] or 0, len(module_ids)
+    )
+    modules.update(order=F("order") + module_offset)
+    lesson_offset = max(
+        lessons.aggregate(Max("order"))["order__max"] or 0, len(lesson_ids)
+    )
+    lessons.update(order=F("order") + lesson_offset)
+
+    Module.objects.bulk_update(
+        [
+            Module(id=module_id, order=order)
+            for order, module_id in enumerate(module_ids, start=1)
+        ],
+        ["order"],
     )
-    user_lesson_progress.completed_at = now()
-    user_lesson_progress.save()
 
-    module = lesson.module
-    all_lessons_completed = all(
-        LessonProgress.objects.filter(
-            enrollment__user=user, lesson=l, completed_at__isnull=False
-        ).exists()
-        for l in module.lessons.all()
-    )
-    if all_lessons_completed:
-        module_progress = ModuleProgress.objects.get(
-            enrollment__user=user, module=module
-        )
-        module_progress.completed_at = now()
-        module_progress.save()
-
-    course = lesson.module.course
-    all_modules_completed = all(
-        ModuleProgress.objects.filter(
-            enrollment__user=user, module=m, completed_at__isnull=False
-        ).exists()
-        for m in Module.objects.filter(course=course)
-    )
-    if all_modules_completed:
-        course_progress = CourseProgress.objects.get(
-            enrollment__user=user, enrollment__course=course
-        )
-        course_progress.completed_at = now()
-        course_progress.save()
-        issue_certificate(user, course)
+    reordered = []
+    position = 0
+    for entry in outline:
+        for order, lesson_id in enumerate(entry["lessons"], start=1):
+            position += 1
+            reordered.append(
+                Lesson(
+                    id=lesson_id, module_id=entry["id"], order=order, position=position
+                )
+            )
+    Lesson.objects.bulk_update(reordered, ["module", "order", "position"])
+
+    schedule_course_version_bump(course.id)
+
+
+def iter_enrollment_chunks(enrollments, chunk_size=PROGRESS_CHUNK_SIZE, start_after=0):
+    """
+    Yields (after_id, up_to_id] id ranges covering `enrollments` in id order, about
+    `chunk_size` enrollments each, without loading the enrollments themselves.
+    """
+    after_id = start_after
+    while True:
+        remaining = enrollments.filter(id__gt=after_id).order_by("id")
+        boundary = remaining.values_list("id", flat=True)[chunk_size - 1 : chunk_size]
+        if boundary:
+            up_to_id = boundary[0]
+        else:
+            up_to_id = remaining.aggregate(Max("id"))["id__max"]
+            if up_to_id is None:
+                return
+        yield after_id, up_to_id
+        after_id = up_to_id
+
+
+def backfill_progress_rows(after_id, up_to_id, course_id=None):
+    """
+    Inserts the missing LessonProgress/ModuleProgress rows for enrollments with ids
+    in (after_id, up_to_id], set-based. Returns the number of rows inserted.
+    """
+    course_filter = "AND e.course_id = %s" if course_id else ""
+    params = [after_id, up_to_id] + ([course_id] if course_id else [])
+    enrollment_table = Enrollment._meta.db_table
+    module_table = Module._meta.db_table
+
+    statements = [
+        f"""
+        INSERT INTO {LessonProgress._meta.db_table}
+            (enrollment_id, user_id, course_id, lesson_id, progress)
+        SELECT e.id, e.user_id, e.course_id, l.id, 0
+        FROM {enrollment_table} e
+        JOIN {module_table} m ON m.course_id = e.course_id
+        JOIN {Lesson._meta.db_table} l ON l.module_id = m.id
+        WHERE e.id > %s AND e.id <= %s {course_filter}
+        ON CONFLICT (enrollment_id, lesson_id) DO NOTHING
+        """,
+        f"""
+        INSERT INTO {ModuleProgress._meta.db_table}
+            (enrollment_id, user_id, course_id, module_id, progress)
+        SELECT e.id, e.user_id, e.course_id, m.id, 0
+        FROM {enrollment_table} e
+        JOIN {module_table} m ON m.course_id = e.course_id
+        WHERE e.id > %s AND e.id <= %s {course_filter}
+        ON CONFLICT (enrollment_id, module_id) DO NOTHING
+        """,
+    ]
+
+    inserted = 0
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql, params)
+            inserted += max(cursor.rowcount, 0)
+    return inserted
 
 
-def get_next_step(user, course, current_lesson_id=None, current_assessment_id=None):
-    lessons = list(
-        Lesson.objects.filter(
-            module__course=course,
-        ).order_by("module__order", "order")
-    )
-    assessments = list(
-        LessonAssessment.objects.filter(lesson__module__course=course).order_by(
-            "lesson__module__order", "lesson__order"
+@transaction.atomic
+def update_lesson_completion(user, lesson):
+    module = lesson.module
+    # Locked first, so a concurrent reconcile_progress --fix can't overwrite this
+    enrollment = Enrollment.objects.select_for_update().get(
+        user=user, course_id=module.course_id
+    )
+    completed_at = now()
+
+    if not _mark_completed(
+        LessonProgress, completed_at, enrollment=enrollment, lesson=lesson
+    ):
+        return
+    invalidate_progress_state(user.id, module.course_id)
+
+    # Totals come from the cached sequence; only this learner's rows are counted
+    sequence = get_course_sequence(module.course_id)
+    completed_lessons = LessonProgress.objects.filter(
+        enrollment=enrollment, lesson__module=module, completed_at__isnull=False
+    ).count()
+    module_completed = False
+    if completed_lessons >= sequence.module_lesson_counts.get(module.id, 0):
+        module_completed = _mark_completed(
+            ModuleProgress, completed_at, enrollment=enrollment, module=module
         )
+    record_enrollment_completion(
+        enrollment, module.course_id, lessons=1, modules=int(module_completed)
     )
+    if not module_completed:
+        return
 
-    sequence = []
+    completed_modules = ModuleProgress.objects.filter(
+        enrollment=enrollment, completed_at__isnull=False
+    ).count()
+    if completed_modules < len(sequence.module_ids):
+        return
+    if _mark_completed(CourseProgress, completed_at, enrollment=enrollment):
+        issue_certificate(user, module.course)
 
-    for lesson in lessons:
-        sequence.append(("lesson", lesson))
-        for a in assessments:
-            if a.lesson.id == lesson.id:
-                sequence.append(("assessment", a))
 
+def _resolve_current_step(sequence, current_lesson_id, current_assessment_id):
     current_index = None
-    current_obj = None
-    for i, (type_, obj) in enumerate(sequence):
-        if (type_ == "lesson" and int(current_lesson_id or 0) == obj.id) or (
-            type_ == "assessment" and int(current_assessment_id or 0) == obj.id
-        ):
-            current_index = i
-            current_obj = obj
-            break
+    if current_lesson_id:
+        current_index = sequence.position("lesson", int(current_lesson_id))
+    if current_index is None and current_assessment_id:
+        current_index = sequence.position("assessment", int(current_assessment_id))
+    return current_index
+
 
+def _serialize_step(user, course, step, url):
+    return {
+        "type": step.type,
+        "id": step.id,
+        "title": step.title,
+        "url": url,
+        "is_unlocked": get_progress_state(user, course.id).is_unlocked(step.lesson_id),
+    }
+
+
+def get_next_step(user, course, current_lesson_id=None, current_assessment_id=None):
+    """
+    Read-only: resolves the step after the current one from cached course and
+    progress state. Assessment steps have no URL until begun with `begin_next_step`.
+    """
+    sequence = get_course_sequence(course.id)
+    current_index = _resolve_current_step(
+        sequence, current_lesson_id, current_assessment_id
+    )
     if current_index is None:
         return {"type": "error", "message": "Invalid current step"}
 
-    if current_index + 1 < len(sequence):
-        next_type, next_obj = sequence[current_index + 1]
-        if next_type == "lesson":
-            # Update lesson_completion if not completed already
-            lesson_progress = LessonProgress.objects.get(
-                enrollment__user=user,
-                lesson_id=int(
-                    current_obj.id
-                    if isinstance(current_obj, Lesson)
-                    else current_obj.lesson.id
-                ),
-            )
+    next_step = sequence.next_step(current_index)
+    if next_step is None:
+        return {"type": "end", "message": "Course Completed"}
 
-            # If the current assessment's lesson hasn't been marked completed for the user AND he has passed the necessary assessment, go ahead an do that
-            if not lesson_progress.completed_at:
-                if current_assessment_id:
-                    if AssessmentSession.objects.filter(
-                        user=user,
-                        content_type=ContentType.objects.get_for_model(LessonAssessment),
-                        object_id=current_assessment_id,
-                        score__gte=50
-                    ).exists():
-                        update_lesson_completion(user, lesson_progress.lesson)
-                        return {
-                            "type": next_type,
-                            "id": next_obj.id,
-                            "title": str(next_obj),
-                            "url": f"/courses/{course.slug}/lessons/{next_obj.id}/",
-                            "is_unlocked": is_lesson_unlocked(user, next_obj),
-                        }
-                else:
-                    update_lesson_completion(user, lesson_progress.lesson)
-
-            return {
-                "type": next_type,
-                "id": next_obj.id,
-                "title": str(next_obj),
-                "url": f"/courses/{course.slug}/lessons/{next_obj.id}/",
-                "is_unlocked": is_lesson_unlocked(user, next_obj),
-            }
-
-        elif next_type == "assessment":
-            lesson_assessment_session = start_lesson_assessment(
-                user, next_obj.lesson.id
-            )
-            return {
-                "type": next_type,
-                "id": next_obj.id,
-                "title": str(next_obj),
-                "url": f"/take-assessment/lesson/{next_obj.lesson.id}/sessions/{lesson_assessment_session.id}/",
-                "is_unlocked": is_assessment_unlocked(user, next_obj),
-            }
+    if next_step.type == "lesson":
+        url = f"/courses/{course.slug}/lessons/{next_step.id}/"
     else:
+        url = None
+    return _serialize_step(user, course, next_step, url)
+
+
+def begin_next_step(user, course, current_lesson_id=None, current_assessment_id=None):
+    """
+    Moves the learner onto the step after the current one. Safe to repeat: the current
+    lesson is only completed once and an open assessment session is reused.
+    """
+    sequence = get_course_sequence(course.id)
+    current_index = _resolve_current_step(
+        sequence, current_lesson_id, current_assessment_id
+    )
+    if current_index is None:
+        return {"type": "error", "message": "Invalid current step"}
+
+    current_step = sequence.step_at(current_index)
+    next_step = sequence.next_step(current_index)
+    if next_step is None:
         return {"type": "end", "message": "Course Completed"}
 
+    if next_step.type == "assessment":
+        session = start_lesson_assessment(user, next_step.lesson_id)
+        url = f"/take-assessment/lesson/{next_step.lesson_id}/sessions/{session.id}/"
+        return _serialize_step(user, course, next_step, url)
 
-def is_lesson_unlocked(user, lesson):
-    if not user.is_authenticated:
-        return False
+    state = get_progress_state(user, course.id)
+    if not state.is_completed(current_step.lesson_id):
+        lesson = Lesson.objects.select_related("module").get(
+            id=current_step.lesson_id
+        )
+        # A lesson with an assessment only completes once that assessment is passed
+        if current_step.type == "lesson":
+            update_lesson_completion(user, lesson)
+        elif AssessmentSession.objects.filter(
+            user=user,
+            content_type=ContentType.objects.get_for_model(LessonAssessment),
+            object_id=current_step.id,
+            score__gte=50,
+        ).exists():
+            update_lesson_completion(user, lesson)
 
-    prev_lessons = Lesson.objects.filter(
-        module=lesson.module,
-        order__lt=lesson.order,
-    )
+    # Serialized after commit so the unlock state reflects the completion above
+    url = f"/courses/{course.slug}/lessons/{next_step.id}/"
+    return _serialize_step(user, course, next_step, url)
 
-    if prev_lessons.exists():
-        if LessonProgress.objects.filter(
-            enrollment__user=user, lesson__in=prev_lessons, completed_at__isnull=True
-        ).exists():
-            return False
 
-    prev_modules = Module.objects.filter(
-        course=lesson.module.course, order__lt=lesson.module.order
-    )
-    if prev_modules.exists():
-        if LessonProgress.objects.filter(
-            enrollment__user=user,
-            lesson__module__in=prev_modules,
-            completed_at__isnull=True,
-        ).exists():
-            return False
+def is_lesson_unlocked(user, lesson):
+    if not user.is_authenticated:
+        return False
 
-    return True
+    return get_progress_state(user, lesson.course_id).is_unlocked(lesson.id)
 
 
 def is_assessment_unlocked(user, assessment):  # Only lesson for now
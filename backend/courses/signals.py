@@ -0,0 +1,81 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from assessments.models import LessonAssessment
+from enrollments.models import Enrollment
+
+from .caching import (forget_course_slug, invalidate_catalog_pages,
+                      invalidate_progress_state, schedule_course_version_bump)
+from .models import Course, CourseLearningPoint, CourseSkill, Lesson, Module
+from .search import schedule_search_vector_refresh
+from .services import (renumber_lesson_positions,
+                       schedule_enrollment_progress_refresh)
+
+
+@receiver(post_save, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    schedule_course_version_bump(instance.id)
+    schedule_search_vector_refresh(instance.id)
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    schedule_course_version_bump(instance.id)
+    forget_course_slug(instance.slug)
+
+
+@receiver([post_save, post_delete], sender=CourseLearningPoint)
+@receiver([post_save, post_delete], sender=CourseSkill)
+def course_detail_changed(sender, instance, **kwargs):
+    schedule_course_version_bump(instance.course_id)
+    schedule_search_vector_refresh(instance.course_id)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    # Content edits leave positions alone
+    if created or instance.placement_changed:
+        renumber_lesson_positions(instance.course_id)
+    schedule_course_version_bump(instance.course_id)
+    if created:
+        schedule_enrollment_progress_refresh(instance.course_id)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    renumber_lesson_positions(instance.course_id)
+    schedule_course_version_bump(instance.course_id)
+    schedule_enrollment_progress_refresh(instance.course_id)
+
+
+@receiver(post_save, sender=Module)
+def module_saved(sender, instance, created, **kwargs):
+    schedule_course_version_bump(instance.course_id)
+    if created:
+        schedule_enrollment_progress_refresh(instance.course_id)
+    else:
+        renumber_lesson_positions(instance.course_id)
+
+
+@receiver(post_delete, sender=Module)
+def module_deleted(sender, instance, **kwargs):
+    schedule_course_version_bump(instance.course_id)
+    schedule_enrollment_progress_refresh(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=LessonAssessment)
+def lesson_assessment_changed(sender, instance, **kwargs):
+    schedule_course_version_bump(instance.lesson.course_id)
+
+
+# The catalog leaves out the viewer's own courses
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, **kwargs):
+    if created:
+        invalidate_catalog_pages([instance.user_id])
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    invalidate_catalog_pages([instance.user_id])
+    invalidate_progress_state(instance.user_id, instance.course_id)
@@ -1,3 +1,177 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from assessments.models import LessonAssessment
+from categories.models import Category
+from enrollments.models import Enrollment
+from users.models import User
+
+from .models import Course, Lesson, Module
+from .search import search_courses
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CourseDetailQueryCountTests(TestCase):
+    # The learner's last accessed lesson; everything else comes from the cache
+    EXPECTED_QUERIES = 1
+    # Slug lookup, then the outline: course with stats, learning points, skills,
+    # tags, modules, and lessons with their assessments
+    COLD_OUTLINE_QUERIES = 7
+    # Course sequence (modules, assessments, lessons), completed lessons and the
+    # enrollment check
+    COLD_PROGRESS_QUERIES = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(title="Programming")
+        cls.instructor = User.objects.create(
+            email="instructor@example.com", full_name="Ada Teach", account_type="I"
+        )
+        cls.student = User.objects.create(
+            email="student@example.com", full_name="Sam Learn", account_type="S"
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Nothing buffered; the write-behind buffer lives in Redis
+        patcher = mock.patch(
+            "courses.serializers.get_buffered_course_activity", return_value=None
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def make_course(self, slug, modules, lessons_per_module):
+        course = Course.objects.create(
+            title=slug,
+            slug=slug,
+            category=self.category,
+            description="A course",
+            instructor=self.instructor,
+        )
+        lessons = []
+        for module_order in range(1, modules + 1):
+            module = Module.objects.create(
+                course=course, order=module_order, title=f"Module {module_order}"
+            )
+            for order in range(1, lessons_per_module + 1):
+                lessons.append(
+                    Lesson(
+                        course=course,
+                        module=module,
+                        order=order,
+                        position=len(lessons) + 1,
+                        title=f"Lesson {module_order}.{order}",
+                        type="ARTICLE",
+                        content="Content",
+                    )
+                )
+        Lesson.objects.bulk_create(lessons)
+        LessonAssessment.objects.create(lesson=lessons[-1])
+        Enrollment.objects.create(user=self.student, course=course)
+        return course
+
+    def get_detail(self, course):
+        return self.client.get(f"/api/courses/{course.slug}/", HTTP_HOST="localhost")
+
+    def assert_detail_queries(self, course, lesson_count):
+        with self.assertNumQueries(
+            self.EXPECTED_QUERIES
+            + self.COLD_OUTLINE_QUERIES
+            + self.COLD_PROGRESS_QUERIES
+        ):
+            response = self.get_detail(course)
+        self.assertEqual(response.status_code, 200)
+        lessons = [
+            lesson
+            for module in response.data["modules"]
+            for lesson in module["lessons"]
+        ]
+        self.assertEqual(response.data["lesson_count"], lesson_count)
+        self.assertEqual(len(lessons), lesson_count)
+        self.assertTrue(response.data["is_enrolled"])
+        self.assertEqual(response.data["resume_lesson_id"], lessons[0]["id"])
+        self.assertTrue(lessons[0]["is_unlocked"])
+        self.assertFalse(lessons[1]["is_unlocked"])
+        self.assertTrue(lessons[-1]["has_assessment"])
+        self.assertFalse(lessons[0]["has_assessment"])
+
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            self.get_detail(course)
+
+    def test_small_course(self):
+        course = self.make_course("small-course", modules=2, lessons_per_module=5)
+        self.assert_detail_queries(course, lesson_count=10)
+
+    def test_large_course(self):
+        course = self.make_course("large-course", modules=20, lessons_per_module=25)
+        self.assert_detail_queries(course, lesson_count=500)
+
+    def test_outline_follows_course_changes(self):
+        course = self.make_course("changing-course", modules=1, lessons_per_module=2)
+        self.get_detail(course)
+
+        module = course.modules.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(module=module, title="Lesson 1.3", type="ARTICLE")
+
+        response = self.get_detail(course)
+        self.assertEqual(response.data["lesson_count"], 3)
+        self.assertEqual(len(response.data["modules"][0]["lessons"]), 3)
+
+    def test_instructor_sees_drafts(self):
+        course = self.make_course("drafted-course", modules=1, lessons_per_module=1)
+        Lesson.objects.filter(course=course).update(draft_content="Draft")
+        self.get_detail(course)
+
+        self.client.force_authenticate(self.instructor)
+        response = self.get_detail(course)
+        lesson = response.data["modules"][0]["lessons"][0]
+        self.assertEqual(lesson["draft_content"], "Draft")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CourseSearchPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title="Programming")
+        instructor = User.objects.create(
+            email="instructor@example.com", full_name="Ada Teach", account_type="I"
+        )
+        cls.courses = [
+            Course.objects.create(
+                title=f"Python {number}",
+                slug=f"python-{number}",
+                category=category,
+                description="A course",
+                instructor=instructor,
+            )
+            for number in range(5)
+        ]
+
+    def test_pages_through_tied_ranks(self):
+        client = APIClient()
+        url = "/api/courses/search/?q=python&page_size=2"
+        ids = []
+        while url:
+            response = client.get(url, HTTP_HOST="localhost")
+            self.assertEqual(response.status_code, 200)
+            ids += [course["id"] for course in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(
+            ids, sorted((course.id for course in self.courses), reverse=True)
+        )
+
+    def test_rank_is_exact(self):
+        # A float rank wouldn't survive the JSON round trip through the cursor
+        course = search_courses(Course.objects.all(), "python").first()
+        self.assertIsInstance(course.rank, int)
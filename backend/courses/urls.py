@@ -5,19 +5,24 @@ from . import views
 urlpatterns = [
     path("", views.CourseListView.as_view()),
     # TODO: Rename URLs after configuring user type (INSTRUCTOR)
-    path("instructed/", views.CourseListView.as_view()),
+    # The instructor pages load the whole list into course pickers, so unpaginated
+    path("instructed/", views.CourseListView.as_view(pagination_class=None)),
     path("instructor/me/", views.InstructorDashboardDetails.as_view()),
     path("<int:course_id>/questions/", views.CourseAssessmentQuestionsView.as_view()),
     path(
         "<int:course_id>/questions/update/", views.CourseAssessmentUpdateView.as_view()
     ),
     path("create/", views.CourseCreateView.as_view()),
+    path("<int:course_id>/reorder/", views.CourseReorderView.as_view()),
     path("last-accessed/", views.LastAccessedCourseView.as_view()),
     path("other-courses/", views.OtherCoursesView.as_view()),
+    path("search/", views.CourseSearchView.as_view()),
+    path("tags/", views.TagFacetView.as_view()),
     path("progress/summary/", views.MyEnrolledProgresssSummary.as_view()),
     path("<slug:course_slug>/", views.CourseDetailView.as_view()),
     path("<slug:course_slug>/next-step/", views.NextStepView.as_view()),
     path("<int:pk>/enroll/", views.CourseEnrollView.as_view()),
+    path("<int:pk>/enroll/bulk/", views.CourseBulkEnrollView.as_view()),
     path("<int:course_id>/lessons/", views.CourseLessonListView.as_view()),
     path(
         "<slug:course_slug>/last-accessed-lesson/",
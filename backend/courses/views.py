@@ -1,5 +1,10 @@
+import hashlib
+import json
+from collections import Counter
+
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 from rest_framework import generics, permissions, status
@@ -10,22 +15,34 @@ from assessments.models import CourseAssessment, LessonAssessment, Question
 from assessments.serializers import QuestionSerializer
 from assessments.services import (update_course_assessment,
                                   update_lesson_assessment)
+from core.pagination import KeysetPagination
 from core.permissions import (IsAdminOrInstructor, IsCourseOwner, IsInstructor,
                               IsStudent)
+from courses.activity import (get_buffered_course_activity,
+                              get_buffered_last_enrollment_id)
+from courses.caching import (forget_course_slug, get_catalog_page,
+                             get_course_id_for_slug, get_course_outline,
+                             get_lesson_index, get_tag_facets)
 from courses.exceptions import NoCourseError, NoLessonError
-from courses.services import (get_next_step, is_lesson_unlocked,
+from courses.services import (begin_next_step, get_enrollment_id,
+                              get_next_step, get_video_progress,
+                              is_lesson_unlocked, save_video_progress,
                               update_lesson_access, update_lesson_completion)
 from enrollments.models import Enrollment
 from enrollments.permissions import IsEnrolled
 
 from .models import (Course, CourseProgress, Lesson, LessonProgress, Module,
                      ModuleProgress)
-from .serializers import (CourseSerializer, CourseUserSerializer,
-                          LessonCreateSerializer, LessonInstructorSerializer,
-                          LessonListSerializer, LessonSerializer,
-                          LessonUpdateSerializer, ModuleCreateSerializer,
-                          ThinCourseSerializer)
-from .services import enroll_user_in_course
+from .search import search_courses
+from .serializers import (CourseCardSerializer, CourseOutlineSerializer,
+                          CourseSearchSerializer, CourseSerializer,
+                          CourseUserSerializer, LessonCreateSerializer,
+                          LessonInstructorSerializer, LessonListSerializer,
+                          LessonSerializer, LessonUpdateSerializer,
+                          ModuleCreateSerializer, OutlineModuleSerializer,
+                          ThinCourseSerializer, with_user_overlay)
+from .services import (bulk_enroll_users, enroll_user_in_course,
+                       read_user_identifiers, reorder_course_outline)
 
 
 class CourseCreateView(APIView):
@@ -42,15 +59,43 @@ class CourseCreateView(APIView):
 
 
 class CourseListView(generics.ListAPIView):
-    queryset = Course.objects.all()
+    queryset = Course.objects.with_stats().select_related("category")
     serializer_class = ThinCourseSerializer
 
 
-class CourseDetailView(generics.RetrieveAPIView):
-    queryset = Course.objects.with_stats()
-    serializer_class = CourseSerializer
-    lookup_field = "slug"
-    lookup_url_kwarg = "course_slug"
+class CourseDetailView(APIView):
+    """
+    Serves the shared, cached course outline merged with the requesting user's
+    progress. The course's instructor gets an uncached render instead, since
+    their lessons carry draft content.
+    """
+
+    queryset = Course.objects.with_stats().with_outline()
+
+    def get(self, request, *args, **kwargs):
+        slug = kwargs.get("course_slug")
+        course_id = get_course_id_for_slug(slug)
+        if course_id is None:
+            raise Http404
+
+        outline = get_course_outline(
+            course_id, lambda: self.build_outline(request, course_id)
+        )
+        if outline["slug"] != slug:
+            # The course was renamed since its slug was cached
+            forget_course_slug(slug)
+            raise Http404
+
+        instructor = outline["instructor"]
+        if instructor and instructor["id"] == request.user.id:
+            course = get_object_or_404(self.queryset, id=course_id)
+            return Response(CourseSerializer(course, context={"request": request}).data)
+
+        return Response(with_user_overlay(outline, request.user))
+
+    def build_outline(self, request, course_id):
+        course = get_object_or_404(self.queryset, id=course_id)
+        return CourseOutlineSerializer(course, context={"request": request}).data
 
 
 class ModuleCreateView(APIView):
@@ -79,8 +124,10 @@ class CourseLessonListView(APIView):
         if not course_id:
             return Response({"error": "course_id is required"}, status=400)
 
-        lessons = Lesson.objects.filter(module__course_id=course_id).order_by(
-            "module__order", "order"
+        lessons = (
+            Lesson.objects.filter(course_id=course_id)
+            .select_related("course", "lessonassessment")
+            .order_by("position")
         )
         return Response(
             LessonListSerializer(lessons, context={"request": request}, many=True).data
@@ -251,16 +298,64 @@ class LessonUpdateView(APIView):
 
 
 class OtherCoursesView(APIView):
+    """Catalog of the courses the viewer isn't enrolled in, cached page by page."""
+
+    permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+
     def get(self, request):
-        user = request.user
-        enrolled_ids = Course.objects.filter(enrollments__user=user).values_list(
-            "id", flat=True
-        )
-        other_courses_qs = Course.objects.exclude(id__in=enrolled_ids).with_stats()
-        serializer = CourseSerializer(
-            other_courses_qs, many=True, context={"request": request}
+        return Response(
+            get_catalog_page(
+                request.user, request.query_params, lambda: self.build_page(request)
+            )
         )
-        return Response(serializer.data)
+
+    def build_page(self, request):
+        courses = Course.objects.exclude_enrolled(request.user).with_card_data()
+        tag = request.query_params.get("tag")
+        if tag:
+            courses = courses.filter(course_tags__tag__slug=tag)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseCardSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data).data
+
+
+class CourseSearchPagination(KeysetPagination):
+    ordering = ("-rank", "-id")
+
+
+class CourseSearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+    pagination_class = CourseSearchPagination
+
+    def get(self, request):
+        params = CourseSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+
+        courses = Course.objects.all()
+        if "tag" in filters:
+            courses = courses.filter(course_tags__tag__slug=filters["tag"])
+        if "category" in filters:
+            courses = courses.filter(category_id=filters["category"])
+        if "min_price" in filters:
+            courses = courses.filter(price__gte=filters["min_price"])
+        if "max_price" in filters:
+            courses = courses.filter(price__lte=filters["max_price"])
+        courses = search_courses(courses, filters["q"]).with_card_data()
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseCardSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TagFacetView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(get_tag_facets())
 
 
 class CourseEnrollView(APIView):
@@ -277,13 +372,7 @@ class CourseEnrollView(APIView):
 
         enroll_user_in_course(request.user, course)
 
-        first_lesson = Lesson.objects.filter(module__course=course).order_by(
-            "module__order", "order"
-        )
-        if first_lesson.exists():
-            first_lesson_id = first_lesson.first().id
-        else:
-            first_lesson_id = None
+        first_lesson_id = get_lesson_index(course.id).first_lesson_id
 
         return Response(
             {"message": "Enrolled successfully.", "first_lesson_id": first_lesson_id},
@@ -291,35 +380,90 @@ class CourseEnrollView(APIView):
         )
 
 
+class CourseBulkEnrollView(APIView):
+    permission_classes = [IsAdminOrInstructor, IsCourseOwner]
+
+    def post(self, request, pk):
+        try:
+            course = Course.objects.get(pk=pk)
+        except Course.DoesNotExist:
+            raise NoCourseError()
+
+        self.check_object_permissions(request, course)
+
+        upload = request.FILES.get("file")
+        if upload:
+            lines = upload.read().decode("utf-8-sig").splitlines()
+            identifiers = read_user_identifiers(lines)
+        elif isinstance(request.data, dict):
+            identifiers = request.data.get("users")
+        else:
+            identifiers = None
+
+        if not isinstance(identifiers, list) or not identifiers:
+            return Response(
+                {"error": "Provide a list of user IDs/emails or a CSV file"},
+                status=400,
+            )
+
+        results = bulk_enroll_users(course, identifiers)
+        summary = Counter(result["status"] for result in results)
+
+        return Response({"summary": summary, "results": results})
+
+
+class CourseReorderView(APIView):
+    permission_classes = [IsAdminOrInstructor, IsCourseOwner]
+
+    def post(self, request, course_id):
+        try:
+            course = Course.objects.get(id=course_id)
+        except Course.DoesNotExist:
+            raise NoCourseError()
+
+        self.check_object_permissions(request, course)
+
+        if not isinstance(request.data, dict):
+            return Response(
+                {"error": "Provide the outline under 'modules'"}, status=400
+            )
+
+        serializer = OutlineModuleSerializer(
+            data=request.data.get("modules"), many=True
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        try:
+            reorder_course_outline(course, serializer.validated_data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response({"message": "Course outline updated"})
+
+
 class MyEnrolledProgresssSummary(APIView):
     permission_classes = [IsStudent]
 
     def get(self, request):
         user = request.user
-        enrolled_course_ids = Enrollment.objects.filter(user=user).values_list(
-            "course_id", flat=True
-        )
-        module_ids = Module.objects.filter(
-            course_id__in=enrolled_course_ids
-        ).values_list("id", flat=True)
-        lesson_ids = Lesson.objects.filter(module_id__in=module_ids).values_list(
-            "id", flat=True
-        )
+        enrolled_course_ids = Enrollment.objects.filter(user=user).values("course_id")
 
-        lesson_total = len(lesson_ids)
-        module_total = len(module_ids)
-        course_total = len(enrolled_course_ids)
+        lesson_total = Lesson.objects.filter(
+            course_id__in=enrolled_course_ids
+        ).count()
+        module_total = Module.objects.filter(course_id__in=enrolled_course_ids).count()
+        course_total = Enrollment.objects.filter(user=user).count()
 
+        # Progress rows only exist for the user's enrollments, and go with them
         lesson_completed = LessonProgress.objects.filter(
-            enrollment__user=user, completed_at__isnull=False, lesson_id__in=lesson_ids
+            user=user, completed_at__isnull=False
         ).count()
         module_completed = ModuleProgress.objects.filter(
-            enrollment__user=user, completed_at__isnull=False, module_id__in=module_ids
+            user=user, completed_at__isnull=False
         ).count()
         course_completed = CourseProgress.objects.filter(
-            enrollment__user=user,
-            completed_at__isnull=False,
-            enrollment__course_id__in=enrolled_course_ids,
+            enrollment__user=user, completed_at__isnull=False
         ).count()
 
         return Response(
@@ -335,17 +479,26 @@ class LastAccessedCourseView(APIView):
     permission_classes = [IsStudent]
 
     def get(self, request):
-        user = request.user
-        course_progress = CourseProgress.objects.filter(
-            enrollment__user=user, last_accessed_at__isnull=False
-        )
-        if course_progress.exists():
-            last_accessed_course = course_progress.latest(
-                "last_accessed_at"
-            ).enrollment.course
-            serializer = CourseUserSerializer(
-                last_accessed_course, context={"request": request}
+        enrollments = Enrollment.objects.filter(user=request.user).with_dashboard_data()
+
+        # Recent activity may still be sitting in the write-behind buffer
+        enrollment = None
+        buffered_id = get_buffered_last_enrollment_id(request.user.id)
+        if buffered_id:
+            enrollment = enrollments.filter(id=buffered_id).first()
+        if enrollment:
+            activity = get_buffered_course_activity(enrollment.id)
+            if activity:
+                enrollment.last_accessed_at, enrollment.resume_lesson_id = activity
+        else:
+            enrollment = (
+                enrollments.filter(courseprogress__last_accessed_at__isnull=False)
+                .order_by("-courseprogress__last_accessed_at")
+                .first()
             )
+
+        if enrollment:
+            serializer = CourseUserSerializer(enrollment, context={"request": request})
             resp = Response(serializer.data)
             resp.data["status"] = "present"
             return resp
@@ -365,7 +518,7 @@ class LessonAccessedView(APIView):
             return Response({"error": "Lesson ID is required"}, status=400)
 
         try:
-            lesson = Lesson.objects.select_related("module__course").get(id=lesson_id)
+            lesson = Lesson.objects.get(id=lesson_id)
         except Lesson.DoesNotExist:
             raise NoLessonError()
 
@@ -429,9 +582,18 @@ class LastAccessedLessonView(APIView):
         except Course.DoesNotExist:
             raise NoCourseError()
 
-        course_progress = CourseProgress.objects.get(enrollment__course=course)
-        if course_progress.last_accessed_lesson:
-            return Response({"lessonId": course_progress.last_accessed_lesson.id})
+        enrollment_id = get_enrollment_id(request.user, course.id)
+        activity = get_buffered_course_activity(enrollment_id)
+        if activity:
+            return Response({"lessonId": activity[1]})
+
+        lesson_id = (
+            CourseProgress.objects.filter(enrollment_id=enrollment_id)
+            .values_list("last_accessed_lesson_id", flat=True)
+            .first()
+        )
+        if lesson_id:
+            return Response({"lessonId": lesson_id})
         else:
             return Response({"error": "No last accessed lesson"})
 
@@ -448,36 +610,30 @@ class LessonVideoProgress(APIView):
         except Lesson.DoesNotExist:
             raise NoLessonError()
 
-        lesson_progress = LessonProgress.objects.get(
-            enrollment__user=request.user, lesson=lesson
-        )
-
-        return Response({"progress": lesson_progress.progress})
+        return Response({"progress": get_video_progress(request.user, lesson)})
 
 
 class SaveLessonVideoProgress(APIView):
     permission_classes = [IsStudent, IsEnrolled]
 
     def post(self, request, *args, **kwargs):
-        try:
-            current_time = request.data.get("current_time")
+        current_time = request.data.get("current_time")
 
-            if not current_time:
-                return Response({"error": "Current time is required"}, status=400)
+        if not current_time:
+            return Response({"error": "Current time is required"}, status=400)
 
+        try:
+            current_time = int(float(current_time))
+        except (TypeError, ValueError):
+            return Response({"error": "Current time must be a number"}, status=400)
+
+        try:
             lesson = Lesson.objects.get(id=kwargs.get("lesson_id"))
-            lesson_progress = LessonProgress.objects.get(
-                enrollment__user=request.user, lesson=lesson
-            )
-            lesson_progress.progress = current_time
-            lesson_progress.save()
-            return Response({"message": "Watch time updated"})
         except Lesson.DoesNotExist:
             raise NoLessonError()
-        except LessonProgress.DoesNotExist:
-            return Response(
-                {"error": "Lesson video progress does not exist"}, status=404
-            )
+
+        save_video_progress(request.user, lesson, current_time)
+        return Response({"message": "Watch time updated"})
 
 
 class NextStepView(APIView):
@@ -495,6 +651,27 @@ class NextStepView(APIView):
             request.user, course, current_lesson_id, current_assessment_id
         )
 
+        etag = '"%s"' % hashlib.md5(
+            json.dumps(data, sort_keys=True).encode()
+        ).hexdigest()
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(data, headers=headers)
+
+    def post(self, request, course_slug):
+        if not course_slug:
+            return Response({"error": "Course slug is required"}, status=400)
+
+        course = get_object_or_404(Course, slug=course_slug)
+        current_lesson_id = request.data.get("current_lesson")
+        current_assessment_id = request.data.get("current_assessment")
+
+        data = begin_next_step(
+            request.user, course, current_lesson_id, current_assessment_id
+        )
+
         return Response(data)
 
 
@@ -505,7 +682,7 @@ class InstructorDashboardDetails(APIView):
         data = {
             "user": user.id,
             "courses_created": Course.objects.filter(instructor=user).count(),
-            "lessons_published": Lesson.objects.filter(module__course__instructor=user).count(),
-            "assessments_ready": LessonAssessment.objects.filter(lesson__module__course__instructor=user).count(),
+            "lessons_published": Lesson.objects.filter(course__instructor=user).count(),
+            "assessments_ready": LessonAssessment.objects.filter(lesson__course__instructor=user).count(),
         }
         return Response(data)
\ No newline at end of file
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+
+def populate_completion_counters(apps, schema_editor):
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+    Lesson = apps.get_model("courses", "Lesson")
+    LessonProgress = apps.get_model("courses", "LessonProgress")
+    Module = apps.get_model("courses", "Module")
+    ModuleProgress = apps.get_model("courses", "ModuleProgress")
+
+    def completed_count(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(
+                    enrollment=OuterRef("pk"), completed_at__isnull=False
+                )
+                .values("enrollment")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    Enrollment.objects.update(
+        completed_lessons=completed_count(LessonProgress),
+        completed_modules=completed_count(ModuleProgress),
+    )
+
+    course_ids = Enrollment.objects.values_list("course_id", flat=True).distinct()
+    for course_id in course_ids:
+        lesson_total = Lesson.objects.filter(module__course_id=course_id).count()
+        module_total = Module.objects.filter(course_id=course_id).count()
+
+        percentage = Value(0.0)
+        if lesson_total:
+            percentage += F("completed_lessons") * Value(70.0 / lesson_total)
+        if module_total:
+            percentage += F("completed_modules") * Value(30.0 / module_total)
+
+        Enrollment.objects.filter(course_id=course_id).update(
+            progress=Cast(
+                Round(percentage, 2),
+                output_field=DecimalField(max_digits=5, decimal_places=2),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0026_remove_course_average_rating_and_more"),
+        ("enrollments", "0003_alter_enrollment_course"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="completed_lessons",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="completed_modules",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="enrollment",
+            name="progress",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["user", "-progress"], name="enrollments_user_id_530e40_idx"
+            ),
+        ),
+        migrations.RunPython(populate_completion_counters, migrations.RunPython.noop),
+    ]
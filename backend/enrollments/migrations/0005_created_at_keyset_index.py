@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0033_created_at_keyset_index"),
+        ("enrollments", "0004_enrollment_completion_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["created_at", "id"], name="enrollments_created_247333_idx"
+            ),
+        ),
+    ]
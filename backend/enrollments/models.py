@@ -1,20 +1,72 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from api.models import TimeStampedModel
 
 User = get_user_model()
 
 
+class EnrollmentQuerySet(models.QuerySet):
+    def with_dashboard_data(self):
+        from courses.models import Lesson, LessonProgress, Module
+
+        def course_count(model, course_lookup):
+            return Coalesce(
+                Subquery(
+                    model.objects.filter(**{course_lookup: OuterRef("course_id")})
+                    .values(course_lookup)
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
+            )
+
+        last_accessed_lesson = (
+            LessonProgress.objects.filter(
+                user=OuterRef("user_id"),
+                course=OuterRef("course_id"),
+                last_accessed_at__isnull=False,
+            )
+            .order_by("-last_accessed_at")
+            .values("lesson_id")[:1]
+        )
+        first_lesson = (
+            Lesson.objects.filter(course=OuterRef("course_id"))
+            .order_by("position")
+            .values("id")[:1]
+        )
+
+        return self.select_related("course__category").annotate(
+            lesson_count=course_count(Lesson, "course"),
+            module_count=course_count(Module, "course"),
+            resume_lesson_id=Coalesce(
+                Subquery(last_accessed_lesson),
+                Subquery(first_lesson),
+                output_field=models.IntegerField(),
+            ),
+            last_accessed_at=F("courseprogress__last_accessed_at"),
+            completed_at=F("courseprogress__completed_at"),
+        )
+
+
 class Enrollment(TimeStampedModel):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     course = models.ForeignKey(
         "courses.Course", on_delete=models.CASCADE, related_name="enrollments"
     )
-    progress = models.PositiveSmallIntegerField(default=0)
+    progress = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    completed_lessons = models.PositiveIntegerField(default=0)
+    completed_modules = models.PositiveIntegerField(default=0)
+    objects = EnrollmentQuerySet.as_manager()
 
     class Meta:
         unique_together = ["user", "course"]
+        indexes = [
+            models.Index(fields=["user", "-progress"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
 
     def __str__(self):
         return (
@@ -4,8 +4,9 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.pagination import KeysetPagination
 from core.permissions import IsCourseOwner, IsOwner, IsStudent
-from courses.models import Course, CourseProgress
+from courses.activity import get_buffered_course_activities
 from courses.serializers import CourseUserSerializer, ThinCourseSerializer
 
 from .models import Enrollment
@@ -15,7 +16,7 @@ logger = logging.getLogger(__name__)
 
 
 class EnrollmentListCreate(generics.ListCreateAPIView):
-    queryset = Enrollment.objects.all()
+    queryset = Enrollment.objects.select_related("user", "course__category")
     serializer_class = EnrollmentSerializer
     permission_classes = [IsStudent]
 
@@ -26,25 +27,26 @@ class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = EnrollmentSerializer
 
 
+class EnrollmentProgressPagination(KeysetPagination):
+    ordering = ("-progress", "-id")
+
+
 class UserEnrollmentList(APIView):
     def get(self, request):
-        logger.info(request.query_params)
         filter = request.query_params.get("filter", "active")
-        enrolled_qs = Course.objects.filter(enrollments__user=request.user)
+        enrollments = Enrollment.objects.filter(user=request.user).with_dashboard_data()
 
         if filter == "completed":
-            completed_course_ids = CourseProgress.objects.filter(
-                enrollment__user=request.user, completed_at__isnull=False
-            ).values_list("enrollment__course_id")
-            enrolled_qs = enrolled_qs.filter(id__in=completed_course_ids)
-
-        serializer = CourseUserSerializer(
-            enrolled_qs, many=True, context={"request": request}
-        )
-        data = sorted(
-            serializer.data,
-            key=lambda enrollment: enrollment["progress"]["percentage"],
-            reverse=True,
-        )
-
-        return Response(data)
+            enrollments = enrollments.filter(courseprogress__completed_at__isnull=False)
+
+        paginator = EnrollmentProgressPagination()
+        page = paginator.paginate_queryset(enrollments, request, view=self)
+        # Recent activity may still be sitting in the write-behind buffer
+        activities = get_buffered_course_activities([e.id for e in page])
+        for enrollment in page:
+            activity = activities.get(enrollment.id)
+            if activity:
+                enrollment.last_accessed_at, enrollment.resume_lesson_id = activity
+        serializer = CourseUserSerializer(page, many=True, context={"request": request})
+
+        return paginator.get_paginated_response(serializer.data)
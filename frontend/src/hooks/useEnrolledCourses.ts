@@ -11,7 +11,7 @@ export const useEnrolledCourses = () => {
     try {
       const response = await api.get(`/api/enrollments/my/?filter=${filter}`);
       const data = response.data;
-      setEnrolledCourses(data);
+      setEnrolledCourses(data.results);
     }catch (error: any){
       if(error.response){
         setError(error.response || error)
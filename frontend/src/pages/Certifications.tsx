@@ -28,7 +28,7 @@ const Certifications = () => {
       const response = await api.get(`/api/certifications/`);
       if(response.status === 200){
         console.log(response.data);
-        setCertifications(response.data);
+        setCertifications(response.data.results);
       }
     };
 
@@ -134,12 +134,12 @@ const CourseDetail = () => {
         )}
 
         {/* Tags (if any) */}
-        {course.tags && course.tags.trim() !== "" && (
+        {course.tags && course.tags.length > 0 && (
           <div className="mt-6">
             <h2 className="text-xl font-semibold mb-2">Tags</h2>
             <div className="flex flex-wrap gap-2">
-              {course.tags.split(",").map((tag, idx) => (
-                <span key={idx} className="bg-blue-100 text-blue-700 text-sm px-3 py-1 rounded-full">{tag.trim()}</span>
+              {course.tags.map((tag, idx) => (
+                <span key={idx} className="bg-blue-100 text-blue-700 text-sm px-3 py-1 rounded-full">{tag}</span>
               ))}
             </div>
           </div>
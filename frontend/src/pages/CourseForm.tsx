@@ -35,9 +35,9 @@ export default function CourseForm({ onCourseSave }: CourseFormProps) {
 
   useEffect(() => {
     const fetchCategories = async () => {
-      const response = await api.get('/api/categories/');
+      const response = await api.get('/api/categories/?page_size=100');
       if(response.status === 200){
-        setCategories(response.data);
+        setCategories(response.data.results);
       }
     };
     fetchCategories();
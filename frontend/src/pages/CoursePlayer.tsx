@@ -41,8 +41,8 @@ export default function CoursePlayer() {
 
   const goToNext = async () => {
     try {
-      const response = await api.get(`/api/courses/${courseSlug}/next-step/`, {
-        params: { current_lesson: lessonId}
+      const response = await api.post(`/api/courses/${courseSlug}/next-step/`, {
+        current_lesson: lessonId
       });
       const next = response.data;
       if(next.type === "lesson"){
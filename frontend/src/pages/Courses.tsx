@@ -7,7 +7,7 @@ import { useEnrolledCourses } from '../hooks/useEnrolledCourses';
 import { timeAgo } from '../utils/utils';
 import { useNavigate } from 'react-router-dom';
 import { usePageTitle } from "../hooks/usePageTitle";
-import type { Course } from '../types/Course';
+import type { CourseCard } from '../types/Course';
 import { useRateLimit } from '../contexts/RateLimitContext';
 import toast from 'react-hot-toast';
 
@@ -17,7 +17,8 @@ const Courses = () => {
   console.log(isRateLimited, cooldown);
   usePageTitle("Courses");
   const navigate = useNavigate();
-  const [otherCourses, setOtherCourses] = useState<Course[] | null>(null);
+  const [otherCourses, setOtherCourses] = useState<CourseCard[] | null>(null);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const { enrolledCourses } = useEnrolledCourses();
 
   useEffect(() => {
@@ -26,20 +27,22 @@ const Courses = () => {
     }
   }, [])
 
-  useEffect(() => {
-    const fetchOtherCourses = async () => {
-      try {
-        const response = await api.get(`/api/courses/other-courses/`);
-        const data = response.data;
-        setOtherCourses(data);
-      }catch (error: any){
-        if(error.response){
-          console.error(error.response);
-        }else{
-          console.error(error);
-        }
+  const fetchOtherCourses = async (url: string = `/api/courses/other-courses/`, append = false) => {
+    try {
+      const response = await api.get(url);
+      const data = response.data;
+      setOtherCourses((prev) => (append && prev ? [...prev, ...data.results] : data.results));
+      setNextPage(data.next);
+    }catch (error: any){
+      if(error.response){
+        console.error(error.response);
+      }else{
+        console.error(error);
       }
-    };
+    }
+  };
+
+  useEffect(() => {
     fetchOtherCourses();
   }, [])
 
@@ -213,7 +216,7 @@ const Courses = () => {
                 {/* Category */}
                 <div className="sm:col-span-2">
                   <span className="text-sm bg-green-200 px-2.5 py-2 rounded-full flex items-center justify-center text-center">
-                    {course.category.title}
+                    {course.category}
                   </span>
                 </div>
 
@@ -230,6 +233,14 @@ const Courses = () => {
                 </div>
               </div>
             ))}
+            {nextPage && (
+              <button
+                onClick={() => fetchOtherCourses(nextPage, true)}
+                className="cursor-pointer bg-white hover:bg-slate-50 px-3 py-2 rounded-xl w-full"
+              >
+                Load more
+              </button>
+            )}
           </div>
         ) : (
           <p className="mt-4">You're enrolled in literally every course XD</p>
@@ -72,9 +72,9 @@ const Tests = () => {
   useEffect(() => {
     const fetchTestAssessments = async () => {
       try {
-        const response = await api.get(`/api/assessments/tests/`);
+        const response = await api.get(`/api/assessments/tests/?page_size=100`);
         const data = await response.data;
-        setTests(data);
+        setTests(data.results);
       }catch(error: any){
         if(error.response){
           console.log(error.response.data);
@@ -91,7 +91,7 @@ const Tests = () => {
       try { 
         const response = await api.get(`/api/sessions/tests/my/`);
         const data = response.data;
-        setTestSessions(data);
+        setTestSessions(data.results);
         console.log(data);
       }catch (error: any){
         if(error.response.data){
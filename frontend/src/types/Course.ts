@@ -9,7 +9,7 @@ export type Course = {
   thumbnail: string,
   modules: Module[] ,
   is_active: boolean,
-  tags: string,
+  tags: string[],
   rating_count: number,
   average_rating: number,
   enrollment_count: number,
@@ -42,6 +42,21 @@ export type EnrolledCourse = {
   status?: string
 }
 
+export type CourseCard = {
+  id: number,
+  title: string,
+  slug: string,
+  thumbnail: string | null,
+  price: string,
+  category: string,
+  instructor: string | null,
+  lesson_count: number,
+  module_count: number,
+  enrollment_count: number,
+  rating_count: number,
+  average_rating: number
+}
+
 export type ThinCourse = {
   id: number,
   title: string,